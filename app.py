@@ -2,44 +2,62 @@
 predict.py
 
 This script launches a Streamlit-based UI to predict Remaining Useful Life (RUL).
-If the model isn't trained yet, it automatically runs the full data pipeline:
-1. preprocessing.py
-2. select_top_features.py
-3. test_preprocessing.py
-4. train_rul_baseline.py
+If the model isn't trained yet, it automatically runs the full data pipeline in-process
+(pipeline.py, which skips any stage whose inputs and parameters are unchanged):
+1. preprocess (preprocessing.py)
+2. correlation select (select_top_features.py)
+3. importance refine (test_preprocessing.py)
+4. train (train_rul_baseline.py)
+
+Predictions show the point RUL together with the interval spanned by the forest's trees and the
+probability of RUL below the urgent threshold (uncertainty.py), all from one model pass.
 
 Perfect for one-click local demos, testing, or onboarding non-technical users.
 """
 
 import streamlit as st
 import pandas as pd
-import joblib
 import os
-import subprocess
+import time
+
+from config import MODERATE_RUL, PREDICTION_QUANTILES, URGENT_RUL
+from feature_engineering import ensure_features
+from fleet import score_fleet
+from input_schema import InputError
+from instrumentation import enable_jsonl, records_since, stage_timer
+from model_store import default_model_path, get_model
+from pipeline import run_pipeline
+from uncertainty import predict_with_uncertainty, quantile_column, risk_column, round_summary
 
 # ----------------------------
 # Step 1: Ensure model exists
 # ----------------------------
 MODEL_PATH = "outputs/rf_rul_model.joblib"
 
+# Stage timings of pipeline runs, model loads and predictions go to outputs/metrics.jsonl
+enable_jsonl()
+
 if not os.path.exists(MODEL_PATH):
     st.warning("Model not found. Running full pipeline to generate model...")
 
     try:
-        subprocess.run(["python", "preprocessing.py"], check=True)
-        subprocess.run(["python", "select_top_features.py"], check=True)
-        subprocess.run(["python", "test_preprocessing.py"], check=True)
-        subprocess.run(["python", "train_rul_baseline.py"], check=True)
+        started = time.time()
+        with st.spinner("Running pipeline..."):
+            run_pipeline()
         st.success("✅ Model pipeline completed successfully!")
+        with st.expander("⏱️ Stage timings"):
+            st.dataframe(pd.DataFrame(records_since(started)), hide_index=True)
 
-    except subprocess.CalledProcessError as e:
+    except Exception as e:
         st.error(f"❌ Pipeline failed: {e}")
         st.stop()
 
 # ----------------------------
-# Step 2: Load Trained Model
+# Step 2: Load Trained Model (cached across reruns/sessions, reloaded only if the file changes)
+# The flat .npz export predicts without sklearn's per-tree dispatch; the joblib model is the fallback
 # ----------------------------
-model = joblib.load(MODEL_PATH)
+loaded = get_model(default_model_path())
+model = loaded.model
 
 # ----------------------------
 # Step 3: UI — Streamlit Frontend
@@ -49,26 +67,40 @@ st.markdown("Upload a CSV file with sensor readings or enter them manually to pr
 
 # Upload input file
 uploaded_file = st.file_uploader("📂 Upload CSV file", type=["csv"])
+fleet_mode = st.checkbox(
+    "🚚 Fleet snapshot: score only the latest cycle of each unit (needs `unit` and `cycle` columns)"
+)
 
 if uploaded_file:
     try:
         input_df = pd.read_csv(uploaded_file)
-        input_df = input_df[model.feature_names_in_]
-        prediction = model.predict(input_df)
-        st.success(f"📈 Predicted RULs: {prediction.round(2).tolist()}")
+        if fleet_mode:
+            with stage_timer("predict_fleet", rows=len(input_df)) as timing:
+                ranked = score_fleet(loaded, input_df)
+            st.success(f"📈 Scored {len(ranked)} units (latest cycle each), most urgent first:")
+            st.dataframe(ranked, hide_index=True)
+        else:
+            if loaded.layout.history_features and {"unit", "cycle"} <= set(input_df.columns):
+                # Rolling/EWMA features from each unit's history in the file, as in training
+                input_df = ensure_features(input_df, loaded.feature_names)
+            loaded.layout.require_row_scoring(input_df.columns)
+            with stage_timer("predict_batch", rows=len(input_df)) as timing:
+                summary = predict_with_uncertainty(loaded, loaded.layout.matrix(input_df))
+            st.success(f"📈 Predicted RULs for {len(summary):,} rows:")
+            st.dataframe(round_summary(summary), hide_index=True)
+        st.caption(f"⏱️ Scored {len(input_df):,} rows in {timing['seconds'] * 1000:.1f} ms")
+    except InputError as e:
+        st.error(f"❌ Invalid input: {e}")
+        st.dataframe(pd.DataFrame(e.errors), hide_index=True)
     except KeyError as e:
         st.error(f"❌ Missing required columns: {e}")
+    except ValueError as e:
+        st.error(f"❌ {e}")
     except Exception as e:
         st.error(f"❌ File read error: {e}")
 
-# Sample CSV download
-sample_data = pd.DataFrame([{
-    "sensor_14": 10.5,
-    "sensor_7": 0.5,
-    "sensor_18": 100.0,
-    "sensor_24": 20.0,
-    "sensor_6": 515.0
-}])
+# Sample CSV download (mid-range values of the model's features, so it passes validation)
+sample_data = pd.DataFrame([loaded.layout.midpoints()])
 
 st.markdown("### 🧾 Need a sample file?")
 st.download_button(
@@ -80,34 +112,51 @@ st.download_button(
 
 # Manual input
 st.markdown("### Or enter values manually:")
+if loaded.layout.history_features:
+    st.info("ℹ️ This model uses rolling/EWMA features of each unit's history: enter them precomputed, "
+            "or upload a CSV with `unit`, `cycle` and the raw sensors instead.")
 manual_input = {}
-for feature in model.feature_names_in_:
-    manual_input[feature] = st.number_input(f"{feature}", step=0.1)
+defaults = loaded.layout.midpoints()
+for feature in loaded.feature_names:
+    manual_input[feature] = st.number_input(f"{feature}", value=defaults[feature], step=0.1)
 
 if st.button("🔍 Predict RUL"):
-    input_df = pd.DataFrame([manual_input])
-    input_df = input_df.astype(float)
-    input_df = input_df.reindex(columns=model.feature_names_in_, fill_value=0.0)
+    try:
+        X = loaded.layout.matrix(manual_input)
+    except InputError as e:
+        st.error(f"❌ Invalid input: {e}")
+        st.dataframe(pd.DataFrame(e.errors), hide_index=True)
+        st.stop()
 
-    prediction = model.predict(input_df)[0]
-    rounded_rul = round(prediction, 2)
+    with stage_timer("predict_single", rows=1) as timing:
+        summary = predict_with_uncertainty(loaded, X, threshold=URGENT_RUL).iloc[0]
+    rounded_rul = round(summary["RUL_pred"], 2)
+    low, high = summary[quantile_column(PREDICTION_QUANTILES[0])], summary[quantile_column(PREDICTION_QUANTILES[-1])]
 
     st.success(f"🔧 Predicted RUL: **{rounded_rul} cycles**")
+    if pd.notna(low):
+        share = PREDICTION_QUANTILES[-1] - PREDICTION_QUANTILES[0]
+        st.markdown(f"📏 {share:.0%} of the model's trees predict **{low:.0f}–{high:.0f} cycles**; "
+                    f"chance of RUL below {URGENT_RUL}: **{summary[risk_column(URGENT_RUL)]:.0%}**")
+    st.caption(f"⏱️ Predicted in {timing['seconds'] * 1000:.2f} ms")
 
-    if rounded_rul < 30:
+    if rounded_rul < URGENT_RUL:
         st.warning("⚠️ Urgent: Component is nearing failure. Schedule maintenance immediately.")
-    elif rounded_rul < 80:
+    elif rounded_rul < MODERATE_RUL:
         st.info("🛠️ Moderate wear: Plan preventive maintenance soon.")
     else:
         st.success("✅ Component is in healthy range. No immediate action required.")
+    if rounded_rul >= URGENT_RUL and pd.notna(low) and low < URGENT_RUL:
+        st.info(f"📉 The lower end of the range is below {URGENT_RUL} cycles: consider inspecting earlier than planned.")
 
     st.markdown("""
     ---
     ### 📘 What does this number mean?
     - **RUL** = how many more cycles this component can likely survive before failure.
+    - The range shows how much the forest's trees disagree; a wide range means a less certain estimate.
     - 1 cycle = one full operation run (e.g., a shift, a flight, a mission).
     - Use this to optimize preventive maintenance planning.
     """)
 
 st.markdown("---")
-st.caption("Model trained with Random Forest. Auto-runs if model file is missing.")
+st.caption(f"Model: {type(model).__name__} (backend set by MODEL_BACKEND in config.py). Auto-runs if model file is missing.")
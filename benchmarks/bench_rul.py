@@ -0,0 +1,58 @@
+"""
+What This Script Does:
+Compares the vectorized RUL computation (compute_rul.compute_rul) against the original
+groupby + merge implementation on a synthetic 10M-row fleet. Reports wall-clock time
+and peak traced memory for each path.
+
+Usage:
+    python benchmarks/bench_rul.py [n_rows]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from synthetic import make_fleet
+
+from compute_rul import compute_rul
+
+
+def compute_rul_merge(df):
+    """Original implementation: groupby max, merge back, subtract, drop."""
+    rul_df = df.groupby('unit')['cycle'].max().reset_index()
+    rul_df.columns = ['unit', 'max_cycle']
+    df = df.merge(rul_df, on='unit', how='left')
+    df['RUL'] = df['max_cycle'] - df['cycle']
+    df.drop(columns=['max_cycle'], inplace=True)
+    return df
+
+
+def measure(func, df):
+    """Return (seconds, peak MB) for one call of `func(df)`."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(df)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1e6
+
+
+def main():
+    n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    df = make_fleet(n_rows)
+    print(f"Synthetic fleet: {len(df):,} rows, {df['unit'].nunique():,} units")
+
+    candidates = {
+        "groupby + merge": compute_rul_merge,
+        "vectorized": compute_rul,
+        "vectorized (in place)": lambda d: compute_rul(d, inplace=True),
+        "vectorized (cap=125)": lambda d: compute_rul(d, cap=125),
+    }
+    for name, func in candidates.items():
+        elapsed, peak_mb = measure(func, df)
+        print(f"{name:<24} {elapsed:8.3f} s   peak {peak_mb:9.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
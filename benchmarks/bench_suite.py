@@ -0,0 +1,238 @@
+"""
+What This Script Does:
+Times the pipeline stages and inference paths on synthetic CMAPSS-shaped fleets at several
+scales (multiples of PM_train.txt's 20,631 rows) and records wall-clock time and peak traced
+memory (tracemalloc: Python and NumPy allocations) for each, plus the process RSS high-water mark
+after the stage (catches native allocations such as sklearn's tree building):
+
+    load_raw              parse the raw whitespace-separated file (cold, no cache)
+    load_raw_cached       load the same file from the columnar .npy cache (data_loader.py)
+    compute_rul           vectorized RUL target (compute_rul.py)
+    correlation_select    feature-vs-RUL correlation ranking (feature_selection.py)
+    train_rf              fit the final Random Forest (RF_PARAMS) on the top IMPORTANCE_TOP_K features
+    model_load_joblib     load the joblib pickle of that forest
+    model_load_npz        load its flat, memory-mapped export (flat_forest.py)
+    predict_single_*      one-row predict latency (median over SINGLE_ROW_CALLS calls)
+    predict_batch_*       predict every row of the fleet in one call
+
+Results are written as JSON (one record per scale and stage, plus the git commit and machine
+info), so runs from different commits can be compared:
+
+    python benchmarks/bench_suite.py [--scales 1 10 100] [--stages load_raw compute_rul ...]
+                                     [--output benchmarks/results/<commit>.json]
+    python benchmarks/bench_suite.py --compare OLD.json NEW.json   # ratios, flags regressions
+
+Training at 100x is slow on small machines; pass a subset of --scales or --stages as needed.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import joblib
+import numpy as np
+
+from synthetic import make_fleet, write_raw
+
+from compute_rul import compute_rul
+from config import IMPORTANCE_TOP_K, RF_PARAMS
+from data_loader import load_cmapss
+from feature_selection import rank_by_correlation
+from flat_forest import FlatForest, export_forest
+from train_rul_baseline import train_model
+
+BASE_ROWS = 20_631  # rows in PM_train.txt
+DEFAULT_SCALES = [1, 10, 100]
+SINGLE_ROW_CALLS = 200
+REGRESSION_RATIO = 1.2  # --compare flags stages at least this much slower
+
+STAGES = [
+    "load_raw",
+    "load_raw_cached",
+    "compute_rul",
+    "correlation_select",
+    "train_rf",
+    "model_load_joblib",
+    "model_load_npz",
+    "predict_single_sklearn",
+    "predict_single_flat",
+    "predict_batch_sklearn",
+    "predict_batch_flat",
+]
+
+
+def measure(func):
+    """Return (result, seconds, peak MB) for one call of `func()`."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+
+def max_rss_mb():
+    """Process peak resident set size so far (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def single_row_latency(predict, row, calls=SINGLE_ROW_CALLS):
+    """Median and p99 seconds of `predict(row)` over `calls` calls."""
+    predict(row)  # warm-up
+    times = np.empty(calls)
+    for i in range(calls):
+        start = time.perf_counter()
+        predict(row)
+        times[i] = time.perf_counter() - start
+    return float(np.median(times)), float(np.percentile(times, 99))
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_scale(scale, stages, workdir, log=print):
+    """Benchmark the selected `stages` on a fleet of `scale` x PM_train.txt; returns result records."""
+    n_rows = BASE_ROWS * scale
+    records = []
+
+    def record(stage, seconds, peak_mb, **extra):
+        records.append({"scale": scale, "rows": n_rows, "stage": stage, "seconds": round(seconds, 6),
+                        "peak_mb": round(peak_mb, 2), "max_rss_mb": round(max_rss_mb(), 1), **extra})
+        log(f"  {stage:<24} {seconds:10.4f} s   peak {peak_mb:9.1f} MB")
+
+    log(f"Scale {scale}x ({n_rows:,} rows)")
+    df = make_fleet(n_rows)
+    raw_path = os.path.join(workdir, f"fleet_{scale}x.txt")
+    cache_dir = os.path.join(workdir, "cache")
+    write_raw(df, raw_path)
+
+    if "load_raw" in stages:
+        df, seconds, peak = measure(lambda: load_cmapss(raw_path, use_cache=False))
+        record("load_raw", seconds, peak)
+    if "load_raw_cached" in stages:
+        load_cmapss(raw_path, cache_dir=cache_dir)  # build the cache outside the measurement
+        df, seconds, peak = measure(lambda: load_cmapss(raw_path, cache_dir=cache_dir))
+        record("load_raw_cached", seconds, peak)
+
+    df, seconds, peak = measure(lambda: compute_rul(df))
+    if "compute_rul" in stages:
+        record("compute_rul", seconds, peak)
+
+    ranking, seconds, peak = measure(lambda: rank_by_correlation(df))
+    if "correlation_select" in stages:
+        record("correlation_select", seconds, peak)
+    features = ranking.head(IMPORTANCE_TOP_K).index.tolist()
+
+    model_stages = [stage for stage in stages if stage.startswith(("train_", "model_", "predict_"))]
+    if not model_stages:
+        return records
+
+    model, seconds, peak = measure(lambda: train_model(df, features, params=RF_PARAMS))
+    if "train_rf" in stages:
+        record("train_rf", seconds, peak, n_estimators=model.n_estimators)
+
+    joblib_path = os.path.join(workdir, f"rf_{scale}x.joblib")
+    npz_path = os.path.join(workdir, f"rf_{scale}x.npz")
+    joblib.dump(model, joblib_path)
+    export_forest(model, npz_path)
+
+    if "model_load_joblib" in stages:
+        _, seconds, peak = measure(lambda: joblib.load(joblib_path))
+        record("model_load_joblib", seconds, peak, file_mb=round(os.path.getsize(joblib_path) / 1e6, 2))
+    flat = FlatForest.load(npz_path)
+    if "model_load_npz" in stages:
+        flat, seconds, peak = measure(lambda: FlatForest.load(npz_path))
+        record("model_load_npz", seconds, peak, file_mb=round(os.path.getsize(npz_path) / 1e6, 2))
+
+    X_frame = df[features]
+    X = X_frame.to_numpy(dtype=np.float32)
+    paths = {
+        "sklearn": (model.predict, X_frame.iloc[:1], X_frame),
+        "flat": (flat.predict, X[:1], X),
+    }
+    for name, (predict, row, batch) in paths.items():
+        if f"predict_single_{name}" in stages:
+            median, p99 = single_row_latency(predict, row)
+            record(f"predict_single_{name}", median, 0.0, p99_seconds=round(p99, 6), calls=SINGLE_ROW_CALLS)
+        if f"predict_batch_{name}" in stages:
+            _, seconds, peak = measure(lambda: predict(batch))
+            record(f"predict_batch_{name}", seconds, peak, rows_per_second=round(len(batch) / seconds))
+    return records
+
+
+def run_suite(scales, stages, log=print):
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for scale in scales:
+            results += run_scale(scale, stages, workdir, log)
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+
+
+def compare(baseline_path, current_path, threshold=REGRESSION_RATIO):
+    """Print current/baseline time ratios per (scale, stage); returns the regressed keys."""
+    with open(baseline_path) as f:
+        baseline = {(r["scale"], r["stage"]): r for r in json.load(f)["results"]}
+    with open(current_path) as f:
+        current = json.load(f)["results"]
+
+    regressions = []
+    print(f"{'scale':>5}  {'stage':<24} {'baseline s':>11} {'current s':>11} {'ratio':>7}")
+    for r in current:
+        key = (r["scale"], r["stage"])
+        if key not in baseline or not baseline[key]["seconds"]:
+            continue
+        ratio = r["seconds"] / baseline[key]["seconds"]
+        flag = "  ⚠️ slower" if ratio >= threshold else ""
+        print(f"{r['scale']:>5}  {r['stage']:<24} {baseline[key]['seconds']:11.4f} {r['seconds']:11.4f} "
+              f"{ratio:7.2f}{flag}")
+        if flag:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages and inference paths")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES,
+                        help="fleet sizes as multiples of PM_train.txt")
+    parser.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES)
+    parser.add_argument("--output", default=None, help="JSON results path (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="compare two result files instead of running")
+    args = parser.parse_args()
+
+    if args.compare:
+        regressions = compare(*args.compare)
+        sys.exit(1 if regressions else 0)
+
+    suite = run_suite(args.scales, args.stages)
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), "results",
+                                         f"{suite['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(suite, f, indent=2)
+    print(f"💾 Results saved at: {output}")
+
+
+if __name__ == "__main__":
+    main()
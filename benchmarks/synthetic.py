@@ -0,0 +1,46 @@
+"""
+What This Script Does:
+Generates synthetic CMAPSS-shaped fleets (unit, cycle, sensor_1..sensor_24) for benchmarks.
+Units are stored in contiguous blocks with cycles 1..life, like PM_train.txt.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Access project modules from parent directory
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.abspath(os.path.join(current_dir, ".."))
+sys.path.append(parent_dir)
+
+from data_loader import COLUMN_NAMES, SENSOR_COLUMNS
+
+
+def make_fleet(n_rows, mean_life=206, seed=0):
+    """Return a synthetic fleet DataFrame with roughly `n_rows` rows."""
+    rng = np.random.default_rng(seed)
+    n_units = max(1, n_rows // mean_life)
+    lives = rng.integers(mean_life // 2, mean_life * 3 // 2, size=n_units, dtype=np.int32)
+    lives[-1] += max(0, n_rows - int(lives.sum()))
+    lives = lives[np.cumsum(lives) - lives < n_rows]
+    total = int(lives.sum())
+
+    units = np.repeat(np.arange(1, len(lives) + 1, dtype=np.int32), lives)
+    starts = np.repeat(np.cumsum(lives) - lives, lives)
+    cycles = (np.arange(total, dtype=np.int32) - starts + 1).astype(np.int32)
+
+    # Sensors drift linearly with wear plus noise, so correlations with RUL are non-trivial
+    wear = cycles / np.repeat(lives, lives).astype(np.float32)
+    slopes = rng.normal(0, 1, size=len(SENSOR_COLUMNS)).astype(np.float32)
+    data = {"unit": units[:n_rows], "cycle": cycles[:n_rows]}
+    for slope, col in zip(slopes, SENSOR_COLUMNS):
+        noise = rng.standard_normal(total, dtype=np.float32)
+        data[col] = (slope * wear + noise)[:n_rows]
+    return pd.DataFrame(data, columns=COLUMN_NAMES)
+
+
+def write_raw(df, path):
+    """Write a fleet in the raw whitespace-separated PM_train.txt layout."""
+    df.to_csv(path, sep=" ", header=False, index=False)
@@ -0,0 +1,212 @@
+"""
+compact_model.py
+
+Smaller Random Forests for serving, and a report of what each size costs in accuracy.
+
+With RF_PARAMS' `max_depth: None` every tree grows until its leaves are (nearly) single samples, so
+the 100 trees hold hundreds of thousands of nodes. This script trains the forest under the limits in
+COMPACT_CANDIDATES (config.py) and can also drop trees that add little:
+- depth caps (`max_depth`), leaf-size floors (`min_samples_leaf`), leaf-count caps (`max_leaf_nodes`)
+- cost-complexity pruning (`ccp_alpha`, in MSE units of the RUL target)
+- tree dropping: trees are ordered by greedy forward selection on their out-of-bag predictions
+  (each step adds the tree that lowers the OOB RMSE of the selected ensemble most), and the first
+  k of COMPACT_TREE_COUNTS trees are kept. Rows a tree was trained on never score that tree, and the
+  PM_truth.txt holdout is not used for selection.
+
+For every variant the report lists holdout RMSE (final cycle of each PM_test.txt engine vs
+PM_truth.txt, as in train_rul_baseline.py), tree and node counts, bytes of the flat `.npz` export
+(what each serving worker maps), `.npz` load time (memory-mapped, as model_store.py loads it), and
+single-row / full-holdout predict latency.
+The report goes to COMPACT_REPORT_PATH. `--save NAME` writes that variant as COMPACT_MODEL_PATH
+(.joblib plus the .npz export), next to the full model; serve.py / score.py take it via `--model`.
+
+Usage:
+    python compact_model.py                      # train every candidate, print and save the report
+    python compact_model.py --candidates full depth_12 leaf_20 --tree-counts 50 25
+    python compact_model.py --save depth_12_trees_50
+"""
+
+import argparse
+import copy
+import json
+import os
+import tempfile
+import time
+
+import joblib
+import numpy as np
+
+from config import (
+    COMPACT_CANDIDATES,
+    COMPACT_MODEL_PATH,
+    COMPACT_REPORT_PATH,
+    COMPACT_TREE_COUNTS,
+    IMPORTANCE_RANKING_PATH,
+    RAW_TEST_PATH,
+    RF_PARAMS,
+    TRAIN_SELECTED,
+    TRUTH_PATH,
+)
+from data_loader import load_cmapss, load_truth
+from feature_engineering import ensure_features
+from feature_selection import load_selected_features
+from flat_forest import FlatForest, export_forest, single_row_latency
+from fleet import last_cycle_per_unit
+from instrumentation import enable_jsonl, stage_timer
+from schema import load_frame
+from train_rul_baseline import evaluate_holdout, train_model
+from uncertainty import tree_predictions
+
+
+def oob_predictions(model, X):
+    """(trees, rows) predictions of every tree (uncertainty.tree_predictions, transposed) and out-of-bag mask."""
+    if not model.bootstrap:
+        raise ValueError("Tree dropping needs out-of-bag rows: the forest must be fitted with bootstrap=True.")
+    predictions = tree_predictions(model, X).T
+    oob = np.ones(predictions.shape, dtype=bool)
+    for i, in_bag in enumerate(model.estimators_samples_):
+        oob[i, in_bag] = False
+    return predictions, oob
+
+
+def select_trees(predictions, oob, y, n_trees=None):
+    """
+    Greedy forward selection of trees by out-of-bag RMSE; returns tree indices, best first.
+
+    Each row is scored by the mean of the selected trees it was out-of-bag for; rows no selected
+    tree has seen out-of-bag yet are left out of the RMSE.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n_trees = len(predictions) if n_trees is None else n_trees
+    oob_sum = np.zeros(len(y))
+    oob_count = np.zeros(len(y))
+    remaining = list(range(len(predictions)))
+    order = []
+    while remaining and len(order) < n_trees:
+        candidate_sum = oob_sum + np.where(oob[remaining], predictions[remaining], 0.0)
+        candidate_count = oob_count + oob[remaining]
+        with np.errstate(invalid="ignore"):
+            squared = np.where(candidate_count > 0, (candidate_sum / candidate_count - y) ** 2, 0.0)
+        rmse = np.sqrt(squared.sum(axis=1) / np.maximum((candidate_count > 0).sum(axis=1), 1))
+        best = remaining.pop(int(np.argmin(rmse)))
+        order.append(best)
+        oob_sum += np.where(oob[best], predictions[best], 0.0)
+        oob_count += oob[best]
+    return order
+
+
+def keep_trees(model, indices):
+    """Copy of the fitted forest with only the trees at `indices`."""
+    compact = copy.copy(model)
+    compact.estimators_ = [model.estimators_[i] for i in indices]
+    compact.n_estimators = len(indices)
+    return compact
+
+
+def measure_variant(model, X_holdout, rmse, workdir):
+    """Size, load time and predict latency of the flat export of `model`."""
+    npz_path = os.path.join(workdir, "variant.npz")
+    export_forest(model, npz_path)
+
+    start = time.perf_counter()
+    flat = FlatForest.load(npz_path)
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    flat.predict(X_holdout)
+    batch_seconds = time.perf_counter() - start
+    return {
+        "rmse": float(rmse),
+        "n_trees": len(model.estimators_),
+        "n_nodes": int(sum(tree.tree_.node_count for tree in model.estimators_)),
+        "max_depth": int(max(tree.tree_.max_depth for tree in model.estimators_)),
+        "npz_bytes": os.path.getsize(npz_path),
+        "load_seconds": round(load_seconds, 6),
+        "single_row_seconds": round(single_row_latency(flat.predict, X_holdout.iloc[:1], calls=200), 6),
+        "holdout_predict_seconds": round(batch_seconds, 6),
+    }
+
+
+def compaction_report(df_train, df_test, df_truth, feature_cols, candidates=COMPACT_CANDIDATES,
+                      tree_counts=COMPACT_TREE_COUNTS, log=print):
+    """Train every candidate (plus its tree-dropped variants); returns (report rows, fitted models by name)."""
+    X_holdout = last_cycle_per_unit(ensure_features(df_test, feature_cols))[feature_cols]
+    rows, models = [], {}
+    with tempfile.TemporaryDirectory(prefix="pdm_compact_") as workdir:
+        for name, params in candidates.items():
+            with stage_timer(f"compact:{name}") as timing:
+                model = train_model(df_train, feature_cols, params={**RF_PARAMS, **params})
+                timing["rows"] = len(df_train)
+            variants = {name: model}
+
+            counts = [k for k in tree_counts if k < len(model.estimators_)]
+            if counts:
+                predictions, oob = oob_predictions(model, df_train[feature_cols])
+                order = select_trees(predictions, oob, df_train["RUL"], max(counts))
+                for k in counts:
+                    variants[f"{name}_trees_{k}"] = keep_trees(model, order[:k])
+
+            for variant, fitted in variants.items():
+                rmse = evaluate_holdout(fitted, df_test, df_truth, feature_cols)
+                row = {"name": variant, "params": params, "train_seconds": timing["seconds"],
+                       **measure_variant(fitted, X_holdout, rmse, workdir)}
+                rows.append(row)
+                models[variant] = fitted
+                log(f"🌲 {variant:<24} RMSE {row['rmse']:6.2f}   {row['npz_bytes'] / 1e6:8.2f} MB   "
+                    f"{row['n_nodes']:>9,} nodes")
+
+    baseline = rows[0]
+    for row in rows:
+        row["size_ratio"] = round(baseline["npz_bytes"] / row["npz_bytes"], 2)
+        row["rmse_delta"] = round(row["rmse"] - baseline["rmse"], 4)
+    return rows, models
+
+
+def print_report(rows):
+    print(f"{'variant':<24} {'RMSE':>7} {'ΔRMSE':>7} {'trees':>6} {'nodes':>10} {'npz MB':>8} {'smaller':>8} "
+          f"{'load ms':>8} {'1-row µs':>9}")
+    for row in rows:
+        print(f"{row['name']:<24} {row['rmse']:7.2f} {row['rmse_delta']:+7.2f} {row['n_trees']:>6} "
+              f"{row['n_nodes']:>10,} {row['npz_bytes'] / 1e6:8.2f} {row['size_ratio']:7.1f}x "
+              f"{row['load_seconds'] * 1e3:8.1f} {row['single_row_seconds'] * 1e6:9.1f}")
+
+
+def save_report(rows, path=COMPACT_REPORT_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(rows, f, indent=2, default=str)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train compact forests and report RMSE vs size/latency")
+    parser.add_argument("--candidates", nargs="+", default=list(COMPACT_CANDIDATES),
+                        choices=list(COMPACT_CANDIDATES), help="the first one is the baseline of the report")
+    parser.add_argument("--tree-counts", type=int, nargs="*", default=list(COMPACT_TREE_COUNTS),
+                        help="also report each candidate with only its best k trees")
+    parser.add_argument("--save", default=None, metavar="VARIANT",
+                        help=f"write this variant to {COMPACT_MODEL_PATH} and its .npz export")
+    args = parser.parse_args()
+    enable_jsonl()
+
+    df_train = load_frame(TRAIN_SELECTED)
+    df_test = load_cmapss(RAW_TEST_PATH)
+    df_truth = load_truth(TRUTH_PATH)
+    feature_cols = load_selected_features(IMPORTANCE_RANKING_PATH)
+
+    candidates = {name: COMPACT_CANDIDATES[name] for name in args.candidates}
+    rows, models = compaction_report(df_train, df_test, df_truth, feature_cols, candidates, args.tree_counts)
+    print_report(rows)
+    save_report(rows)
+    print(f"💾 Compaction report saved at: {COMPACT_REPORT_PATH}")
+
+    if args.save:
+        if args.save not in models:
+            raise SystemExit(f"❌ Unknown variant '{args.save}'. Available: {sorted(models)}")
+        joblib.dump(models[args.save], COMPACT_MODEL_PATH)
+        npz_path = os.path.splitext(COMPACT_MODEL_PATH)[0] + ".npz"
+        export_forest(models[args.save], npz_path)
+        print(f"💾 Compact model '{args.save}' saved at: {COMPACT_MODEL_PATH} and {npz_path}")
+
+
+if __name__ == "__main__":
+    main()
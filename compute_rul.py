@@ -1,30 +1,62 @@
 """
 compute_rul.py
 
-This script defines a reusable function to compute the Remaining Useful Life (RUL)
+This module defines a reusable function to compute the Remaining Useful Life (RUL)
 for each row in a dataset of engine or machine cycles.
 
 The function:
-- Groups the dataset by unit ID to find the maximum cycle for each engine.
+- Finds the maximum cycle of each unit in a single vectorized pass:
+  `np.maximum.reduceat` over contiguous unit blocks when the data is sorted by unit
+  (the CMAPSS layout), or `groupby().transform('max')` otherwise. No merge, no helper frame.
 - Calculates RUL as the difference between the max cycle and the current cycle.
-- Appends a new RUL column to the original DataFrame.
+- Optionally clips RUL to a piecewise-linear target (the standard CMAPSS cap is 125 cycles).
+- Adds the RUL column to a shallow copy of the input, or to the input itself with `inplace=True`.
 
 This function is used to prepare the target variable for model training and evaluation.
 """
 
-import pandas as pd
+import numpy as np
 
-def compute_rul(df):
+from instrumentation import timed
+
+
+def max_cycle_per_row(units, cycles):
+    """
+    Return each row's unit-level maximum cycle.
+
+    `units` and `cycles` are 1-D arrays. Fast path for data stored in contiguous unit blocks.
+    """
+    n = len(units)
+    if n == 0:
+        return np.empty(0, dtype=cycles.dtype)
+    starts = np.flatnonzero(np.r_[True, units[1:] != units[:-1]])
+    block_max = np.maximum.reduceat(cycles, starts)
+    return np.repeat(block_max, np.diff(np.r_[starts, n]))
+
+
+@timed("compute_rul")
+def compute_rul(df, cap=None, inplace=False):
     """Compute Remaining Useful Life (RUL) for a dataset."""
-    rul_df = df.groupby('unit')['cycle'].max().reset_index()
-    rul_df.columns = ['unit', 'max_cycle']
-    
-    df = df.merge(rul_df, on='unit', how='left')
-    df['RUL'] = df['max_cycle'] - df['cycle']
-    df.drop(columns=['max_cycle'], inplace=True)
-    
+    cycles = df['cycle'].to_numpy()
+
+    if df['unit'].is_monotonic_increasing:
+        max_cycle = max_cycle_per_row(df['unit'].to_numpy(), cycles)
+    else:
+        max_cycle = df.groupby('unit', sort=False)['cycle'].transform('max').to_numpy()
+
+    rul = max_cycle - cycles
+    if cap is not None:
+        if float(cap).is_integer():
+            np.minimum(rul, np.asarray(cap).astype(rul.dtype), out=rul)
+        else:
+            # A fractional cap is kept as given: the target becomes float instead of being truncated
+            rul = np.minimum(rul, cap)
+
+    if not inplace:
+        return df.assign(RUL=rul)
+    df['RUL'] = rul
     return df
 
 # Example Usage
 # df_train = compute_rul(df_train)
-# df_test = compute_rul(df_test)
+# df_train = compute_rul(df_train, cap=125)  # piecewise-linear target
@@ -8,21 +8,151 @@ RAW_TRAIN_PATH = "dataset/PM_train.txt"
 RAW_TEST_PATH = "dataset/PM_test.txt"
 TRUTH_PATH = "dataset/PM_truth.txt"
 
+# Columnar .npy cache of parsed raw files (keyed by source file hash)
+CACHE_DIR = "dataset/.cache"
+
 TRAIN_WITH_RUL = "dataset/df_train_with_rul.csv"
 TRAIN_SELECTED = "dataset/df_train_selected.csv"
 TEST_SELECTED = "dataset/df_test_selected.csv"
 
 MODEL_OUTPUT_PATH = "outputs/rf_rul_model.joblib"
+MODEL_NPZ_PATH = "outputs/rf_rul_model.npz"  # flat, mmap-able export of the forest (flat_forest.py)
+MODEL_METRICS_PATH = "outputs/model_metrics.json"  # backend and holdout RMSE of the current model
+
+# Feature-vs-RUL sufficient statistics and the persisted correlation ranking
+CORRELATION_STATS_PATH = "outputs/correlation_stats.json"
+FEATURE_RANKING_PATH = "outputs/feature_ranking.json"
+IMPORTANCE_RANKING_PATH = "outputs/importance_ranking.json"  # features the final model trains on
 
 # === Feature Selection ===
-TOP_N_FEATURES = 20
+TOP_N_FEATURES = 10
+IMPORTANCE_TOP_K = 5  # sensors kept after the RF importance refinement
+IMPORTANCE_SAMPLE_FRAC = 0.5  # share of units (stratified by lifetime) used for importance refinement
+
+# Small forest used only to rank features (fully grown trees on half-size bootstraps);
+# ~10x cheaper than the final RF and selects the same top 5 on the CMAPSS sample
+IMPORTANCE_RF_PARAMS = {
+    "n_estimators": 20,
+    "max_samples": 0.5,
+    "random_state": 42,
+    "n_jobs": -1
+}
+
+# === EDA Report (eda_stats.py, eda/report.py) ===
+EDA_STATS_PATH = "outputs/eda_stats.npz"  # written by the pipeline's eda_stats stage
+EDA_TRACE_POINTS = 50  # cycles kept per unit in the downsampled RUL/sensor traces
+EDA_REPORT_DIR = "outputs/eda"
+
+# === Rolling / Trend Features (feature_engineering.py) ===
+ROLLING_FEATURES = False  # add per-unit rolling and EWMA columns to the candidates before feature selection
+ROLLING_WINDOWS = (5, 10, 20)  # window lengths in cycles
+ROLLING_STATS = ("mean", "std", "slope")
+EWMA_SPANS = (10,)
 
 # === Preprocessing ===
+STREAM_CHUNKSIZE = 500_000  # rows per chunk in streaming mode (streaming.py)
+RUL_CAP = None  # set to 125 for the standard piecewise-linear CMAPSS target
 SCALING_METHOD = "minmax"  # options: 'minmax', 'standard'
 
+# === Streaming Telemetry State (unit_state.py) ===
+UNIT_STATE_PATH = "outputs/unit_state.npz"  # checkpoint of per-unit state
+
+# === Instrumentation (instrumentation.py) ===
+METRICS_PATH = "outputs/metrics.jsonl"  # stage timings appended by the scripts, pipeline and UIs
+PROFILE_DIR = "outputs/profiles"  # cProfile dumps when PDM_PROFILE=cprofile
+
+# === Maintenance Status Thresholds (cycles of predicted RUL) ===
+URGENT_RUL = 30
+MODERATE_RUL = 80
+
+# === Prediction Uncertainty (uncertainty.py) ===
+PREDICTION_QUANTILES = (0.1, 0.9)  # interval bounds from the spread of per-tree predictions
+RISK_THRESHOLD = URGENT_RUL  # batch/fleet scoring reports P(RUL < RISK_THRESHOLD)
+
+# === Batch Scoring (score.py) ===
+SCORE_CHUNKSIZE = 100_000  # rows per prediction batch
+
+# === Input Validation (input_schema.py) ===
+FEATURE_RANGES_PATH = "outputs/feature_ranges.json"  # training min/max per model feature, written with the model
+INPUT_RANGE_MARGIN = 0.5  # accept values up to this share of the training span outside [min, max]; None: no range check
+INPUT_RANGE_MIN_SLACK = 1.0  # but at least this much either side (features constant in training)
+
+# === Inference Service (serve.py) ===
+SERVE_HOST = "127.0.0.1"
+SERVE_PORT = 8080
+SERVE_MAX_BATCH = 256  # rows per coalesced model call
+SERVE_MAX_WAIT_MS = 2.0  # how long the first request of a batch waits for others
+SERVE_MAX_BODY_BYTES = 4 * 1024 * 1024  # larger request bodies are refused with HTTP 413
+
+# === Model Backend (see model_backends.py) ===
+MODEL_BACKEND = "random_forest"  # options: 'random_forest', 'hist_gradient_boosting', 'lightgbm'
+
 # === Model Hyperparameters (for baseline RF) ===
 RF_PARAMS = {
     "n_estimators": 100,
     "max_depth": None,
+    "random_state": 42,
+    "n_jobs": -1  # use every core
+}
+
+# === Model Hyperparameters (histogram gradient boosting) ===
+HGB_PARAMS = {
+    "max_iter": 300,
+    "learning_rate": 0.05,
+    "max_leaf_nodes": 31,
     "random_state": 42
 }
+
+LGBM_PARAMS = {
+    "n_estimators": 300,
+    "learning_rate": 0.05,
+    "num_leaves": 31,
+    "random_state": 42,
+    "verbose": -1
+}
+
+BACKEND_PARAMS = {
+    "random_forest": RF_PARAMS,
+    "hist_gradient_boosting": HGB_PARAMS,
+    "lightgbm": LGBM_PARAMS
+}
+
+# === Model Compaction (compact_model.py) ===
+# RF_PARAMS overrides per candidate; the first one is the baseline of the report
+COMPACT_CANDIDATES = {
+    "full": {},
+    "depth_12": {"max_depth": 12},
+    "depth_10": {"max_depth": 10},
+    "leaf_5": {"min_samples_leaf": 5},
+    "leaf_20": {"min_samples_leaf": 20},
+    "leaves_256": {"max_leaf_nodes": 256},
+    "ccp_5": {"ccp_alpha": 5.0}  # cost-complexity pruning is much slower to fit than the limits above
+}
+COMPACT_TREE_COUNTS = (50, 20)  # also report each candidate with only its best k trees (OOB-selected)
+COMPACT_REPORT_PATH = "outputs/compaction_report.json"
+COMPACT_MODEL_PATH = "outputs/rf_rul_model_compact.joblib"  # --save writes here, plus the .npz export
+
+# === Hyperparameter Search (model_search.py) ===
+SEARCH_FOLDS = 5  # GroupKFold splits by unit
+SEARCH_HALVING_FACTOR = 3  # keep the best 1/factor of candidates per rung, with factor x more units
+SEARCH_MIN_UNIT_FRAC = 0.2  # share of each fold's training units in the first rung
+SEARCH_RESULTS_PATH = "outputs/search_results.json"
+
+SEARCH_SPACE = {
+    "random_forest": {
+        "n_estimators": [100, 200],
+        "max_depth": [None, 12, 20],
+        "min_samples_leaf": [1, 5, 20],
+        "max_features": [1.0, 0.5]
+    },
+    "hist_gradient_boosting": {
+        "learning_rate": [0.03, 0.05, 0.1],
+        "max_leaf_nodes": [15, 31, 63],
+        "min_samples_leaf": [20, 50]
+    },
+    "lightgbm": {
+        "learning_rate": [0.03, 0.05, 0.1],
+        "num_leaves": [15, 31, 63],
+        "min_child_samples": [20, 50]
+    }
+}
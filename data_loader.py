@@ -0,0 +1,119 @@
+"""
+data_loader.py
+
+Fast loader for the raw CMAPSS files (PM_train.txt / PM_test.txt / PM_truth.txt).
+
+What it does:
+- Parses the whitespace-separated CMAPSS format with pandas' C engine and explicit dtypes
+  (int32 for `unit`/`cycle`, float32 for the 24 sensors) instead of the slow python engine.
+- Writes a columnar cache next to the dataset: one `.npy` file per column, stored in a folder
+  keyed by the SHA-1 of the source file, so an edited or replaced export is never served stale.
+- On later runs, memory-maps the cached columns and skips parsing entirely.
+
+Every script in the pipeline should load raw data through `load_cmapss()`.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from config import CACHE_DIR
+from instrumentation import timed
+
+# 1 unit ID + 1 cycle + 24 sensors
+COLUMN_NAMES = ["unit", "cycle"] + [f"sensor_{i}" for i in range(1, 24 + 1)]
+ID_COLUMNS = ["unit", "cycle"]
+SENSOR_COLUMNS = COLUMN_NAMES[2:]
+
+COLUMN_DTYPES = {col: np.int32 for col in ID_COLUMNS}
+COLUMN_DTYPES.update({col: np.float32 for col in SENSOR_COLUMNS})
+
+_HASH_BLOCK_SIZE = 1 << 20
+
+
+def file_sha1(path):
+    """Return the SHA-1 hex digest of a file, read in 1 MB blocks."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def parse_cmapss(path, chunksize=None):
+    """
+    Parse a raw CMAPSS sensor file into a typed DataFrame (no caching).
+
+    With `chunksize`, returns an iterator of DataFrames of at most that many rows.
+    """
+    return pd.read_csv(
+        path,
+        sep=r"\s+",
+        header=None,
+        names=COLUMN_NAMES,
+        usecols=range(len(COLUMN_NAMES)),
+        dtype=COLUMN_DTYPES,
+        engine="c",
+        chunksize=chunksize,
+    )
+
+
+def _cache_folder(path, cache_dir):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, f"{stem}-{file_sha1(path)}")
+
+
+def _write_cache(df, folder):
+    """Write one .npy per column plus a small metadata file, atomically per folder."""
+    tmp_folder = folder + ".tmp"
+    os.makedirs(tmp_folder, exist_ok=True)
+    for col in df.columns:
+        np.save(os.path.join(tmp_folder, f"{col}.npy"), df[col].to_numpy())
+    meta = {"columns": list(df.columns), "n_rows": len(df)}
+    with open(os.path.join(tmp_folder, "meta.json"), "w") as f:
+        json.dump(meta, f)
+    if os.path.exists(folder):
+        # Left over from an interrupted run (no meta.json), safe to discard
+        shutil.rmtree(folder)
+    os.replace(tmp_folder, folder)
+
+
+def _read_cache(folder, mmap=True):
+    with open(os.path.join(folder, "meta.json")) as f:
+        meta = json.load(f)
+    mmap_mode = "r" if mmap else None
+    data = {
+        col: np.load(os.path.join(folder, f"{col}.npy"), mmap_mode=mmap_mode)
+        for col in meta["columns"]
+    }
+    return pd.DataFrame(data, columns=meta["columns"], copy=False)
+
+
+@timed("load_raw")
+def load_cmapss(path, cache_dir=CACHE_DIR, use_cache=True, mmap=True):
+    """
+    Load a raw CMAPSS sensor file, using the columnar cache when available.
+
+    The returned frame is backed by read-only memory maps when served from the cache;
+    pass `mmap=False` (or call `.copy()`) if you need to modify it in place.
+    """
+    if not use_cache:
+        return parse_cmapss(path)
+
+    folder = _cache_folder(path, cache_dir)
+    if os.path.exists(os.path.join(folder, "meta.json")):
+        return _read_cache(folder, mmap=mmap)
+
+    df = parse_cmapss(path)
+    _write_cache(df, folder)
+    return df
+
+
+def load_truth(path):
+    """Load the RUL truth file (one value per test unit) as a DataFrame with an `RUL` column."""
+    values = np.loadtxt(path, dtype=np.int32, ndmin=1)
+    return pd.DataFrame({"RUL": values})
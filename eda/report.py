@@ -0,0 +1,155 @@
+"""
+What This Script Does:
+Renders the whole EDA report to image files in one process, headlessly (no windows, no pyplot
+state), from the statistics the pipeline's eda_stats stage precomputed (outputs/eda_stats.npz,
+see eda_stats.py):
+
+    sensor_correlations.png   all sensors by |correlation| with RUL, top TOP_N_FEATURES highlighted
+    top10_selected.png        top 10 correlated sensors, the model's selected features highlighted
+    rul_trends.png            RUL vs cycle for the chosen units
+    sensor_traces.png         the selected features vs cycle for the chosen units
+    unit_lifetimes.png        histogram of cycles per unit
+
+Nothing re-reads df_train_with_rul.csv or recomputes correlations, so every plot shows the same
+numbers, and the selected features come from the importance stage instead of a hard-coded list.
+The plot functions take a Matplotlib Axes, so the single-plot scripts next to this one reuse them.
+
+Usage:
+    python eda/report.py [--stats outputs/eda_stats.npz] [--output-dir outputs/eda] [--units 1 2 3]
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+from matplotlib.figure import Figure
+
+# Access config from parent directory
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.abspath(os.path.join(current_dir, ".."))
+sys.path.append(parent_dir)
+
+from config import EDA_REPORT_DIR, EDA_STATS_PATH
+from eda_stats import load_eda_stats
+
+PURPLE = "#8e44ad"
+
+
+def _unit_rows(stats, units):
+    """Row of each unit id in the per-unit arrays."""
+    index = {int(unit): i for i, unit in enumerate(stats["units"])}
+    missing = [unit for unit in units if unit not in index]
+    if missing:
+        raise ValueError(f"❌ Units {missing} are not in the EDA statistics.")
+    return [index[unit] for unit in units]
+
+
+def plot_sensor_correlations(stats, ax):
+    """All sensors by |correlation| with RUL; the top TOP_N_FEATURES picks in purple."""
+    features = list(stats["features"])
+    top = set(stats["top_features"])
+    values = np.abs(stats["correlations"])
+    ax.barh(features, values, color=[PURPLE if f in top else "#dcdcdc" for f in features])
+    ax.invert_yaxis()
+    ax.set_title(f"All Sensor Correlations with RUL\n(Top {len(top)} Highlighted in Purple)", fontsize=14)
+    ax.set_xlabel("Correlation Coefficient (Absolute)")
+    ax.set_ylabel("Sensor")
+    ax.grid(True, linestyle='--', alpha=0.3)
+
+
+def plot_top10_selected(stats, ax, n=10):
+    """The `n` sensors most correlated with RUL; the features the model uses in purple."""
+    features = list(stats["features"][:n])
+    selected = set(stats["selected_features"])
+    ax.barh(features, stats["correlations"][:n], color=[PURPLE if f in selected else "gray" for f in features])
+    ax.invert_yaxis()
+    ax.set_title(f"Top {n} Sensors by Correlation with RUL\n(Purple = Used in Model)", fontsize=14)
+    ax.set_xlabel("Correlation with RUL")
+    ax.set_ylabel("Sensor Feature")
+    ax.grid(True, linestyle='--', alpha=0.4)
+
+
+def plot_rul_trends(stats, ax, units=(1,)):
+    """RUL over cycles of each unit in `units` (downsampled trace)."""
+    trace_cycle, trace_rul = stats["trace_cycle"], stats["trace_rul"]
+    for unit, row in zip(units, _unit_rows(stats, units)):
+        ax.plot(trace_cycle[row], trace_rul[row], marker="o", linestyle="-", linewidth=2,
+                markersize=3, label=f"Unit {unit}", color=PURPLE if len(units) == 1 else None)
+    title = f"RUL Trend for Unit {units[0]}" if len(units) == 1 else "RUL Trends"
+    ax.set_title(title, fontsize=14, color=PURPLE)
+    ax.set_xlabel("Time Cycle", fontsize=12)
+    ax.set_ylabel("Remaining Useful Life (RUL)", fontsize=12)
+    if len(units) > 1:
+        ax.legend()
+    ax.grid(True, linestyle='--', alpha=0.4)
+
+
+def traced_features(stats):
+    """The selected features that have traces (statistics written before engineered traces lack them)."""
+    sensors = set(stats["sensors"])
+    return [feature for feature in stats["selected_features"] if feature in sensors]
+
+
+def plot_sensor_traces(stats, axes, units=(1,)):
+    """One Axes per traced selected feature: its values over cycles for each unit in `units`."""
+    sensors = list(stats["sensors"])
+    trace_cycle, trace_sensors = stats["trace_cycle"], stats["trace_sensors"]
+    rows = _unit_rows(stats, units)
+    for ax, feature in zip(axes, traced_features(stats)):
+        for unit, row in zip(units, rows):
+            ax.plot(trace_cycle[row], trace_sensors[row, :, sensors.index(feature)], label=f"Unit {unit}")
+        ax.set_title(feature)
+        ax.set_xlabel("Time Cycle")
+        ax.grid(True, linestyle='--', alpha=0.4)
+    axes[0].legend()
+
+
+def plot_unit_lifetimes(stats, ax, bins=30):
+    """Histogram of cycles per unit (engine lifetime)."""
+    ax.hist(stats["cycle_counts"], bins=bins, color=PURPLE, alpha=0.8)
+    ax.set_title(f"Engine Lifetimes ({len(stats['cycle_counts'])} units)", fontsize=14)
+    ax.set_xlabel("Cycles to Failure")
+    ax.set_ylabel("Units")
+    ax.grid(True, linestyle='--', alpha=0.4)
+
+
+def render_report(stats, output_dir=EDA_REPORT_DIR, units=(1,)):
+    """Write every plot of the report as PNG into `output_dir`; returns the file paths."""
+    os.makedirs(output_dir, exist_ok=True)
+    n_selected = len(traced_features(stats))
+    plots = {
+        "sensor_correlations": ((12, 8), 1, lambda axes: plot_sensor_correlations(stats, axes[0])),
+        "top10_selected": ((10, 6), 1, lambda axes: plot_top10_selected(stats, axes[0])),
+        "rul_trends": ((10, 5), 1, lambda axes: plot_rul_trends(stats, axes[0], units)),
+        "unit_lifetimes": ((8, 5), 1, lambda axes: plot_unit_lifetimes(stats, axes[0])),
+    }
+    if n_selected:
+        plots["sensor_traces"] = ((4 * n_selected, 4), n_selected, lambda axes: plot_sensor_traces(stats, axes, units))
+    paths = []
+    for name, (figsize, n_axes, draw) in plots.items():
+        fig = Figure(figsize=figsize)
+        draw(np.atleast_1d(fig.subplots(1, n_axes)))
+        fig.tight_layout()
+        path = os.path.join(output_dir, f"{name}.png")
+        fig.savefig(path, dpi=100)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the EDA report from the precomputed statistics")
+    parser.add_argument("--stats", default=EDA_STATS_PATH, help="artifact written by the pipeline's eda_stats stage")
+    parser.add_argument("--output-dir", default=EDA_REPORT_DIR)
+    parser.add_argument("--units", type=int, nargs="+", default=[1], help="units shown in the trace plots")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.stats):
+        raise SystemExit(f"❌ {args.stats} not found. Run pipeline.py first.")
+    with load_eda_stats(args.stats) as stats:
+        paths = render_report(stats, args.output_dir, args.units)
+    print(f"💾 EDA report ({len(paths)} plots) saved in: {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+eda_stats.py
+
+The precomputed statistics behind the EDA report (eda/report.py), written once by the pipeline's
+`eda_stats` stage so plots never rescan the training data.
+
+What it stores (one `.npz`, EDA_STATS_PATH in config.py):
+- `features`, `correlations`: every sensor's correlation with RUL (strongest |r| first), from one
+  vectorized pass over the training frame (feature_selection.correlation_moments)
+- `top_features`: the TOP_N_FEATURES correlation picks; `selected_features`: the features the
+  importance stage selected for the model (importance_ranking.json), so plots never hard-code them
+- `units`, `cycle_counts`: cycles per unit (engine lifetime), one sorted pass
+- `trace_cycle`, `trace_rul`, `trace_sensors`: per-unit traces downsampled to at most
+  EDA_TRACE_POINTS evenly spaced cycles, shapes (units, points) and (units, points, sensors),
+  NaN-padded for units with fewer cycles, float32. Thousands of units stay a few MB.
+  `sensors` names the trace columns: every raw sensor, then any engineered selected feature
+  (ROLLING_FEATURES), computed per unit with feature_engineering.rolling_features.
+
+`load_eda_stats` returns the lazy `np.load` view: each plot reads only the arrays it uses.
+
+Usage:
+    stats = compute_eda_stats(df_train, selected_features)
+    save_eda_stats(stats)                 # normally done by pipeline.py
+    stats = load_eda_stats()
+"""
+
+import os
+
+import numpy as np
+
+from config import EDA_STATS_PATH, EDA_TRACE_POINTS, TOP_N_FEATURES
+from feature_engineering import parse_feature, rolling_features
+from feature_selection import EXCLUDE_COLUMNS, correlation_moments
+from instrumentation import timed
+
+
+def unit_bounds(units):
+    """(unit ids, first row, row count) of each run of equal ids in sorted `units`."""
+    if len(units) == 0:
+        return units[:0], np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, units[1:] != units[:-1]])
+    counts = np.diff(np.r_[starts, len(units)])
+    return units[starts], starts, counts
+
+
+def trace_rows(starts, counts, points=EDA_TRACE_POINTS):
+    """(units, points) row indices of evenly spaced cycles per unit (always first and last), -1 where padded."""
+    n_points = np.minimum(counts, points)
+    j = np.arange(points)
+    step = (counts - 1) / np.maximum(n_points - 1, 1)
+    rows = starts[:, None] + np.floor(j[None, :] * step[:, None]).astype(np.int64)
+    return np.where(j[None, :] < n_points[:, None], rows, -1)
+
+
+def _take(values, rows):
+    out = values[np.maximum(rows, 0)].astype(np.float32)
+    out[rows < 0] = np.nan
+    return out
+
+
+@timed("eda_stats")
+def compute_eda_stats(df, selected_features=(), points=EDA_TRACE_POINTS, top_n=TOP_N_FEATURES):
+    """Statistics dict for the EDA report from the training frame (with RUL)."""
+    correlations = correlation_moments(df).correlations()
+    correlations = correlations.sort_values(key=lambda r: r.abs().fillna(-1.0), ascending=False)
+    sensors = [col for col in df.columns if col not in EXCLUDE_COLUMNS]
+    engineered = [name for name in selected_features if name not in df.columns and parse_feature(name)]
+
+    # Traces index the original rows through the (unit, cycle) order; the frame itself is not copied
+    order = np.lexsort((df["cycle"].to_numpy(), df["unit"].to_numpy()))
+    units, starts, counts = unit_bounds(df["unit"].to_numpy()[order])
+    rows = trace_rows(starts, counts, points)
+    rows = np.where(rows >= 0, order[np.maximum(rows, 0)], -1)
+    trace_values = df[sensors].to_numpy()
+    if engineered:
+        trace_values = np.hstack([trace_values, rolling_features(df, engineered).to_numpy()])
+
+    return {
+        "features": np.asarray(correlations.index, dtype=str),
+        "correlations": correlations.to_numpy(dtype=np.float64),
+        "top_features": np.asarray(correlations.index[:top_n], dtype=str),
+        "selected_features": np.asarray(list(selected_features), dtype=str),
+        "sensors": np.asarray(sensors + engineered, dtype=str),
+        "units": units,
+        "cycle_counts": counts.astype(np.int32),
+        "trace_cycle": _take(df["cycle"].to_numpy(), rows),
+        "trace_rul": _take(df["RUL"].to_numpy(), rows),
+        "trace_sensors": _take(trace_values, rows),
+    }
+
+
+def save_eda_stats(stats, path=EDA_STATS_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    np.savez(path, **stats)
+
+
+def load_eda_stats(path=EDA_STATS_PATH):
+    """Lazy view of the stored statistics (arrays are read on first access)."""
+    return np.load(path, allow_pickle=False)
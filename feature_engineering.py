@@ -0,0 +1,249 @@
+"""
+feature_engineering.py
+
+Rolling-window and trend features per unit, computed with vectorized kernels (no groupby().rolling()).
+
+For every base sensor and window `w` (ROLLING_WINDOWS in config.py, in cycles):
+- `{sensor}_mean_{w}`   mean of the unit's last `w` readings
+- `{sensor}_std_{w}`    population standard deviation (ddof=0) of those readings
+- `{sensor}_slope_{w}`  least-squares slope per cycle of those readings
+and for every span `s` (EWMA_SPANS):
+- `{sensor}_ewma_{s}`   exponentially weighted mean, alpha = 2 / (s + 1), started at the unit's first reading
+
+Windows are truncated at the start of each unit (min_periods=1), so the first row of a unit
+has mean = reading, std = 0 and slope = 0.
+
+How it stays fast:
+- Mean, std and slope come from cumulative sums of x, x² and k·x over the whole column,
+  differenced at each row's window bounds. One O(rows) pass per sensor, whatever the window.
+- Values are centered on each unit's first reading before summing, so the differences stay exact
+  to ~1e-12 even over tens of millions of rows.
+- The EWMA is a single `scipy.signal.lfilter` over the column, with the carry-over from the
+  previous unit removed analytically at each unit boundary.
+
+Serving (`window_features`) computes the same features for the latest cycle of each unit from a
+short history (the ring buffer kept by unit_state.py) plus the running EWMA state. Outputs are
+float32 on both paths and match to float32 precision.
+
+Usage:
+    df = add_rolling_features(df)                 # all configured features for all sensors
+    df = ensure_features(df, model_feature_names)  # only the engineered columns a model needs
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+from config import EWMA_SPANS, ROLLING_STATS, ROLLING_WINDOWS
+from data_loader import SENSOR_COLUMNS
+from instrumentation import timed
+
+_FEATURE_PATTERN = re.compile(r"^(?P<sensor>.+)_(?P<stat>mean|std|slope|ewma)_(?P<window>\d+)$")
+
+
+def parse_feature(name):
+    """(sensor, stat, window) for an engineered feature name, or None for a plain column."""
+    match = _FEATURE_PATTERN.match(name)
+    if match is None:
+        return None
+    return match["sensor"], match["stat"], int(match["window"])
+
+
+def feature_names(sensors, windows=ROLLING_WINDOWS, stats=ROLLING_STATS, ewma_spans=EWMA_SPANS):
+    """Names of the engineered columns for `sensors`, in output order."""
+    names = []
+    for sensor in sensors:
+        names += [f"{sensor}_{stat}_{w}" for w in windows for stat in stats]
+        names += [f"{sensor}_ewma_{span}" for span in ewma_spans]
+    return names
+
+
+def base_sensors(names):
+    """Raw sensor columns needed to compute `names` (plain names pass through), in first-seen order."""
+    sensors = []
+    for name in names:
+        parsed = parse_feature(name)
+        sensor = parsed[0] if parsed else name
+        if sensor not in sensors:
+            sensors.append(sensor)
+    return sensors
+
+
+def required_window(names):
+    """Longest rolling window used by `names` (1 if none): the history serving needs to keep."""
+    windows = [parsed[2] for parsed in map(parse_feature, names) if parsed and parsed[1] != "ewma"]
+    return max(windows, default=1)
+
+
+def required_spans(names):
+    """Sorted EWMA spans used by `names`."""
+    return sorted({parsed[2] for parsed in map(parse_feature, names) if parsed and parsed[1] == "ewma"})
+
+
+def ewma_alpha(span):
+    return 2.0 / (span + 1.0)
+
+
+def _sort_order(units, cycles):
+    """Row order grouping units with cycles ascending, or None if the rows are already in it."""
+    if len(units) < 2:
+        return None
+    unit_step = np.diff(units)
+    if (unit_step >= 0).all() and (np.diff(cycles)[unit_step == 0] > 0).all():
+        return None
+    return np.lexsort((cycles, units))
+
+
+class _UnitLayout:
+    """Row positions of sorted (unit, cycle) data and per-window bounds, shared by every sensor."""
+
+    def __init__(self, units):
+        n_rows = len(units)
+        self.row = np.arange(n_rows)
+        is_start = np.r_[True, units[1:] != units[:-1]] if n_rows else np.zeros(0, dtype=bool)
+        self.start = np.maximum.accumulate(np.where(is_start, self.row, 0)) if n_rows else self.row
+        self.pos = (self.row - self.start).astype(np.float64)
+        self._windows = {}
+        self._decay = {}
+
+    def window(self, w):
+        """(lo, n, sk, denom) for a window of `w` rows truncated at the unit start."""
+        if w not in self._windows:
+            lo = np.maximum(self.row - w + 1, self.start)
+            n = (self.row - lo + 1).astype(np.float64)
+            # Positions a..b within the unit; their sums have closed forms
+            a = self.pos - n + 1
+            b = self.pos
+            sk = (a + b) * n / 2.0
+            skk = (b * (b + 1) * (2 * b + 1) - (a - 1) * a * (2 * a - 1)) / 6.0
+            self._windows[w] = lo, n, sk, n * skk - sk * sk
+        return self._windows[w]
+
+    def decay(self, alpha):
+        """(1 - alpha) ** (pos + 1): how much of the previous unit's EWMA leaks into each row."""
+        if alpha not in self._decay:
+            self._decay[alpha] = np.power(1.0 - alpha, self.pos + 1)
+        return self._decay[alpha]
+
+
+def _rolling_sensor(x, layout, specs, out):
+    """Fill `out[name]` for one sensor column `x` (float64, sorted by unit/cycle)."""
+    start = layout.start
+    first = x[start]
+    xc = x - first
+
+    stats = {stat for _, stat, _ in specs}
+    c1 = np.concatenate(([0.0], np.cumsum(xc)))
+    c2 = np.concatenate(([0.0], np.cumsum(xc * xc))) if "std" in stats else None
+    ck = np.concatenate(([0.0], np.cumsum(layout.pos * xc))) if "slope" in stats else None
+
+    for name, stat, w in specs:
+        if stat == "ewma":
+            alpha = ewma_alpha(w)
+            g = lfilter([alpha], [1.0, alpha - 1.0], xc)
+            # Remove what the previous unit carried into this one: g[start - 1], decayed
+            carry = np.concatenate(([0.0], g[:-1]))[start]
+            out[name] = (first + g - carry * layout.decay(alpha)).astype(np.float32)
+            continue
+
+        lo, n, sk, denom = layout.window(w)
+        s1 = c1[1:] - c1[lo]
+        if stat == "mean":
+            out[name] = (first + s1 / n).astype(np.float32)
+        elif stat == "std":
+            s2 = c2[1:] - c2[lo]
+            mean = s1 / n
+            out[name] = np.sqrt(np.maximum(s2 / n - mean * mean, 0.0)).astype(np.float32)
+        else:
+            skx = ck[1:] - ck[lo]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                slope = np.where(denom > 0, (n * skx - sk * s1) / denom, 0.0)
+            out[name] = slope.astype(np.float32)
+
+
+@timed("rolling_features")
+def rolling_features(df, names):
+    """DataFrame (same index as `df`) with the engineered columns `names`, computed per unit."""
+    units = df["unit"].to_numpy()
+    order = _sort_order(units, df["cycle"].to_numpy())
+    if order is not None:
+        units = units[order]
+    layout = _UnitLayout(units)
+
+    by_sensor = {}
+    for name in names:
+        sensor, stat, window = parse_feature(name)
+        by_sensor.setdefault(sensor, []).append((name, stat, window))
+
+    out = {}
+    for sensor, specs in by_sensor.items():
+        x = df[sensor].to_numpy(dtype=np.float64)
+        if order is not None:
+            x = x[order]
+        _rolling_sensor(x, layout, specs, out)
+
+    if order is not None:
+        inverse = np.empty_like(order)
+        inverse[order] = layout.row
+        out = {name: values[inverse] for name, values in out.items()}
+    return pd.DataFrame({name: out[name] for name in names}, index=df.index)
+
+
+def add_rolling_features(df, sensors=None, windows=ROLLING_WINDOWS, stats=ROLLING_STATS, ewma_spans=EWMA_SPANS):
+    """Copy of `df` with the configured rolling/EWMA columns for `sensors` (default: all sensors in `df`)."""
+    if sensors is None:
+        sensors = [col for col in SENSOR_COLUMNS if col in df.columns]
+    names = feature_names(sensors, windows, stats, ewma_spans)
+    return pd.concat([df, rolling_features(df, names)], axis=1)
+
+
+def ensure_features(df, names):
+    """`df` plus any engineered columns of `names` it lacks (returned unchanged if none are missing)."""
+    missing = [name for name in names if name not in df.columns and parse_feature(name)]
+    if not missing:
+        return df
+    return pd.concat([df, rolling_features(df, missing)], axis=1)
+
+
+def window_features(history, sensors, names, ewma_state=None, spans=()):
+    """
+    Features `names` for the latest reading of each unit, from its recent history.
+
+    `history` is (units, window, len(sensors)), oldest → newest, NaN-padded in front for units with
+    fewer readings than `window`. `ewma_state` is (units, len(spans), len(sensors)): the running EWMA
+    per span. Plain sensor names return the latest reading.
+    """
+    history = np.asarray(history, dtype=np.float64)
+    sensor_index = {sensor: i for i, sensor in enumerate(sensors)}
+    span_index = {span: i for i, span in enumerate(spans)}
+    X = np.empty((len(history), len(names)), dtype=np.float32)
+
+    for j, name in enumerate(names):
+        parsed = parse_feature(name)
+        if parsed is None:
+            X[:, j] = history[:, -1, sensor_index[name]]
+            continue
+        sensor, stat, w = parsed
+        if stat == "ewma":
+            X[:, j] = ewma_state[:, span_index[w], sensor_index[sensor]]
+            continue
+
+        h = history[:, -w:, sensor_index[sensor]]
+        valid = ~np.isnan(h)
+        n = valid.sum(axis=1)
+        mean = np.nansum(h, axis=1) / n
+        if stat == "mean":
+            X[:, j] = mean
+            continue
+        dev = np.where(valid, h - mean[:, None], 0.0)
+        if stat == "std":
+            X[:, j] = np.sqrt((dev * dev).sum(axis=1) / n)
+            continue
+        t = np.where(valid, np.arange(h.shape[1], dtype=np.float64), 0.0)
+        t_dev = np.where(valid, t - (t.sum(axis=1) / n)[:, None], 0.0)
+        denom = (t_dev * t_dev).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            X[:, j] = np.where(denom > 0, (t_dev * dev).sum(axis=1) / denom, 0.0)
+    return X
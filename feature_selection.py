@@ -0,0 +1,94 @@
+"""
+feature_selection.py
+
+Correlation-based feature ranking against RUL, shared by select_top_features.py, streaming.py
+and the eda/ scripts.
+
+What it does:
+- Computes only the feature-vs-RUL correlations (not the full sensor x sensor matrix) in one
+  vectorized pass, via the mergeable `RunningMoments` sufficient statistics from streaming.py.
+- Persists those statistics (outputs/correlation_stats.json) so a new data batch can be merged
+  in without rescanning the history, and the ranking re-derived for free.
+- Persists the ranking and the selected top `TOP_N_FEATURES` (outputs/feature_ranking.json)
+  for the downstream stages. The readers/writers for both files live in streaming.py, next to
+  `RunningMoments`.
+- Persists the model-importance ranking from test_preprocessing.py (outputs/importance_ranking.json),
+  which is the feature list the final training stage reads.
+
+Usage (merge a new batch of raw data into the stored statistics and re-rank):
+    python feature_selection.py --add path/to/new_PM_train.txt
+"""
+
+import argparse
+import json
+import os
+
+from config import CORRELATION_STATS_PATH, FEATURE_RANKING_PATH, IMPORTANCE_RANKING_PATH, TOP_N_FEATURES
+from instrumentation import timed
+from streaming import RunningMoments, load_moments, save_moments, save_ranking, stream_rul_moments
+
+EXCLUDE_COLUMNS = ["unit", "cycle", "RUL"]
+
+
+@timed("correlation")
+def correlation_moments(df, target="RUL", exclude=EXCLUDE_COLUMNS):
+    """Feature-vs-target sufficient statistics for every non-excluded column of `df`."""
+    features = [col for col in df.columns if col not in exclude]
+    return RunningMoments(features).update(df[features].to_numpy(), df[target].to_numpy())
+
+
+def rank_by_correlation(df, target="RUL", exclude=EXCLUDE_COLUMNS):
+    """Correlation of each feature with `target`, sorted by absolute value (strongest first)."""
+    rul_corr = correlation_moments(df, target, exclude).correlations()
+    return rul_corr.sort_values(key=abs, ascending=False)
+
+
+def importance_ranking(importances, top_k):
+    """JSON-ready ranking: every feature's importance plus the selected top-k names."""
+    importances = importances.sort_values(ascending=False)
+    return {
+        "importances": {name: float(value) for name, value in importances.items()},
+        "selected_features": importances.head(top_k).index.tolist(),
+    }
+
+
+def save_importance_ranking(importances, top_k, path=IMPORTANCE_RANKING_PATH):
+    """Write model importances and the selected top-k feature names; returns the selection."""
+    ranking = importance_ranking(importances, top_k)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(ranking, f, indent=2)
+    return ranking["selected_features"]
+
+
+def load_selected_features(path=IMPORTANCE_RANKING_PATH):
+    """Feature names chosen by the importance stage, in ranking order."""
+    with open(path) as f:
+        return json.load(f)["selected_features"]
+
+
+def update_ranking(moments, stats_path=CORRELATION_STATS_PATH, ranking_path=FEATURE_RANKING_PATH,
+                   top_n=TOP_N_FEATURES):
+    """Merge new-batch statistics into the stored ones, persist both, and return the new top-N."""
+    if os.path.exists(stats_path):
+        stored = load_moments(stats_path)
+        if stored.features != moments.features:
+            raise ValueError("Stored correlation statistics were computed over different features.")
+        moments = stored.merge(moments)
+    save_moments(moments, stats_path)
+    return save_ranking(moments.correlations(), top_n, ranking_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge a new raw data batch into the correlation ranking")
+    parser.add_argument("--add", required=True, help="raw CMAPSS file with complete run-to-failure units")
+    parser.add_argument("--top-n", type=int, default=TOP_N_FEATURES)
+    args = parser.parse_args()
+
+    top_features = update_ranking(stream_rul_moments(args.add), top_n=args.top_n)
+    print(f"🔹 Top {args.top_n} sensor features after update:", top_features)
+    print(f"💾 Ranking saved at: {FEATURE_RANKING_PATH}")
+
+
+if __name__ == "__main__":
+    main()
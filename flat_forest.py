@@ -0,0 +1,288 @@
+"""
+flat_forest.py
+
+Compact, pickle-free serialization of a fitted RandomForestRegressor.
+
+What it does:
+- Flattens every fitted tree into contiguous NumPy arrays (feature, threshold, left/right
+  children, leaf value) concatenated across trees, plus each tree's root offset.
+- Saves them as an *uncompressed* `.npz`, so each array can be memory-mapped straight out of
+  the zip file: loading is near-instant and several worker processes share the same pages.
+- Rebuilds a lightweight `FlatForest` predictor from those arrays — no sklearn unpickling.
+
+Prediction engines (leaves point to themselves, so a finished traversal simply stops moving):
+- "numba"  compiled per-row, per-tree loop, used automatically when numba is installed
+           (`pip install numba`); single rows take microseconds.
+- "numpy"  all trees of a batch advance together as one (rows, trees) node matrix, one vectorized
+           step per tree level. No per-tree Python loop, no joblib dispatch.
+Both use float32 inputs against float64 thresholds, like sklearn, and match its predictions to
+~1e-12 (`--verify` checks this on the training data).
+
+`tree_predictions(X)` returns every tree's prediction, (rows, trees), from the same traversal,
+for interval and risk estimates (uncertainty.py).
+
+Usage (export the trained model, optionally verify it and time single-row predictions):
+    python flat_forest.py [outputs/rf_rul_model.joblib] [outputs/rf_rul_model.npz] [--verify]
+"""
+
+import argparse
+import os
+import time
+import zipfile
+
+import joblib
+import numpy as np
+
+from config import MODEL_NPZ_PATH, MODEL_OUTPUT_PATH, TRAIN_SELECTED
+from schema import load_frame
+
+try:
+    import numba
+except ImportError:  # optional: the vectorized NumPy traversal is used instead
+    numba = None
+
+_NUMPY_BLOCK_ROWS = 4096
+VERIFY_TOLERANCE = 1e-6
+
+
+def flatten_forest(model):
+    """Dict of flat arrays describing every tree of a fitted sklearn forest regressor."""
+    if not hasattr(model, "estimators_"):
+        raise TypeError(f"{type(model).__name__} is not a fitted tree ensemble; only forests can be flattened.")
+
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        n_nodes = tree.node_count
+        node_ids = np.arange(n_nodes, dtype=np.int32)
+        is_leaf = tree.children_left == -1
+
+        # Global node ids; leaves loop back to themselves
+        left = np.where(is_leaf, node_ids, tree.children_left) + offset
+        right = np.where(is_leaf, node_ids, tree.children_right) + offset
+
+        features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+        thresholds.append(tree.threshold.astype(np.float64))
+        lefts.append(left.astype(np.int32))
+        rights.append(right.astype(np.int32))
+        values.append(tree.value[:, 0, 0].astype(np.float64))
+        roots.append(offset)
+        offset += n_nodes
+
+    return {
+        "feature": np.concatenate(features),
+        "threshold": np.concatenate(thresholds),
+        "left": np.concatenate(lefts),
+        "right": np.concatenate(rights),
+        "value": np.concatenate(values),
+        "roots": np.asarray(roots, dtype=np.int64),
+        "feature_names": np.asarray(getattr(model, "feature_names_in_", []), dtype=str),
+        "max_depth": np.asarray(max(e.tree_.max_depth for e in model.estimators_), dtype=np.int64),
+    }
+
+
+def export_forest(model, path=MODEL_NPZ_PATH):
+    """
+    Write a fitted forest to an uncompressed, mmap-able `.npz`.
+
+    The file is written next to `path` and renamed over it, so processes that still have the old
+    export memory-mapped keep reading the old inode instead of crashing on a truncated file.
+    """
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, **flatten_forest(model))
+    os.replace(tmp_path, path)
+
+
+def remove_export(path=MODEL_NPZ_PATH):
+    """Delete a flat export left by an earlier forest, so loaders fall back to the current joblib model."""
+    if os.path.exists(path):
+        os.remove(path)
+        return True
+    return False
+
+
+def _mmap_npz(path):
+    """Memory-map every member of an uncompressed `.npz` (np.load ignores mmap_mode for zips)."""
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as f:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path} is compressed; re-export it with export_forest().")
+            # Local file header: 30 fixed bytes + file name + extra field, then the .npy payload
+            f.seek(info.header_offset + 26)
+            name_len, extra_len = np.frombuffer(f.read(4), dtype="<u2")
+            f.seek(info.header_offset + 30 + int(name_len) + int(extra_len))
+            if np.lib.format.read_magic(f) == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            name = info.filename[:-len(".npy")]
+            if dtype.hasobject:
+                raise ValueError(f"{path} contains pickled objects and cannot be memory-mapped.")
+            if shape == ():
+                arrays[name] = np.frombuffer(f.read(dtype.itemsize), dtype=dtype)[0]
+                continue
+            arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=f.tell(), shape=shape,
+                                     order="F" if fortran_order else "C")
+    return arrays
+
+
+def _tree_values_numpy(X, feature, threshold, left, right, value, roots):
+    """All trees at once: a (rows, trees) matrix of node ids advanced one level per step; returns their leaf values."""
+    n_rows, n_features = X.shape
+    flat_X = X.ravel()
+    row_offset = (np.arange(n_rows, dtype=np.int64) * n_features)[:, None]
+    node = np.repeat(roots[None, :], n_rows, axis=0)
+    while True:
+        go_left = flat_X[row_offset + feature[node]] <= threshold[node]
+        next_node = np.where(go_left, left[node], right[node])
+        # Leaves point to themselves, so nothing moves once every row reached a leaf in every tree
+        if np.array_equal(next_node, node):
+            break
+        node = next_node
+    return value[node]
+
+
+def _predict_numpy(X, *forest):
+    return _tree_values_numpy(X, *forest).mean(axis=1)
+
+
+if numba is not None:
+    @numba.njit(cache=True, nogil=True)
+    def _predict_compiled(X, feature, threshold, left, right, value, roots):
+        # Tree-major order: one tree's nodes stay in cache while every row walks it
+        out = np.zeros(X.shape[0])
+        for root in roots:
+            for i in range(X.shape[0]):
+                node = root
+                while left[node] != node:
+                    if X[i, feature[node]] <= threshold[node]:
+                        node = left[node]
+                    else:
+                        node = right[node]
+                out[i] += value[node]
+        return out / len(roots)
+
+    @numba.njit(cache=True, nogil=True)
+    def _tree_values_compiled(X, feature, threshold, left, right, value, roots):
+        out = np.empty((X.shape[0], len(roots)))
+        for t in range(len(roots)):
+            for i in range(X.shape[0]):
+                node = roots[t]
+                while left[node] != node:
+                    if X[i, feature[node]] <= threshold[node]:
+                        node = left[node]
+                    else:
+                        node = right[node]
+                out[i, t] = value[node]
+        return out
+else:
+    _predict_compiled = _tree_values_compiled = None
+
+ENGINES = ["numba", "numpy"] if numba is not None else ["numpy"]
+
+
+class FlatForest:
+    """Random Forest predictor over flat arrays, with the `predict` / `feature_names_in_` surface."""
+
+    def __init__(self, arrays, engine="auto"):
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.value = arrays["value"]
+        self.roots = np.asarray(arrays["roots"]).astype(self.left.dtype)
+        self.max_depth = int(arrays["max_depth"])
+        self.feature_names_in_ = np.asarray(arrays["feature_names"], dtype=object)
+        self.n_features_in_ = len(self.feature_names_in_)
+        self.n_estimators = len(self.roots)
+        self._feature_list = list(self.feature_names_in_)
+        # Plain ndarray views of the (possibly memory-mapped) arrays, as the kernels take them
+        self._kernel_args = tuple(np.asarray(a) for a in (self.feature, self.threshold, self.left, self.right,
+                                                          self.value, self.roots))
+        self.engine = ENGINES[0] if engine == "auto" else engine
+        if self.engine not in ENGINES:
+            raise ValueError(f"Engine '{engine}' is not available. Available: {ENGINES}")
+
+    @classmethod
+    def load(cls, path=MODEL_NPZ_PATH, mmap=True, engine="auto"):
+        if mmap:
+            return cls(_mmap_npz(path), engine)
+        with np.load(path, allow_pickle=False) as data:
+            return cls({name: data[name] for name in data.files}, engine)
+
+    def _as_matrix(self, X):
+        if hasattr(X, "columns"):
+            X = X.to_numpy() if list(X.columns) == self._feature_list else X[self._feature_list].to_numpy()
+        # sklearn compares float32 inputs against float64 thresholds
+        return np.ascontiguousarray(np.asarray(X, dtype=np.float32), dtype=np.float64)
+
+    def predict(self, X):
+        """Mean prediction over all trees."""
+        X = self._as_matrix(X)
+        if self.engine == "numba":
+            return _predict_compiled(X, *self._kernel_args)
+        out = np.empty(len(X))
+        # Blocks bound the (rows, trees) node matrix of the vectorized traversal
+        for start in range(0, len(X), _NUMPY_BLOCK_ROWS):
+            out[start:start + _NUMPY_BLOCK_ROWS] = _predict_numpy(X[start:start + _NUMPY_BLOCK_ROWS],
+                                                                  *self._kernel_args)
+        return out
+
+    def tree_predictions(self, X):
+        """(rows, trees) prediction of every tree, from the same traversal `predict` averages."""
+        X = self._as_matrix(X)
+        if self.engine == "numba":
+            return _tree_values_compiled(X, *self._kernel_args)
+        out = np.empty((len(X), self.n_estimators))
+        for start in range(0, len(X), _NUMPY_BLOCK_ROWS):
+            out[start:start + _NUMPY_BLOCK_ROWS] = _tree_values_numpy(X[start:start + _NUMPY_BLOCK_ROWS],
+                                                                      *self._kernel_args)
+        return out
+
+
+def max_abs_error(model, flat, X):
+    """Largest absolute difference between `flat.predict(X)` and the sklearn forest's prediction."""
+    return float(np.max(np.abs(flat.predict(X) - model.predict(X)))) if len(X) else 0.0
+
+
+def single_row_latency(predict, row, calls=1000):
+    """Median seconds per `predict(row)` call."""
+    predict(row)  # warm-up (compiles the numba kernel on first use)
+    times = np.empty(calls)
+    for i in range(calls):
+        start = time.perf_counter()
+        predict(row)
+        times[i] = time.perf_counter() - start
+    return float(np.median(times))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a fitted forest to a flat, mmap-able .npz")
+    parser.add_argument("model", nargs="?", default=MODEL_OUTPUT_PATH)
+    parser.add_argument("output", nargs="?", default=MODEL_NPZ_PATH)
+    parser.add_argument("--verify", action="store_true",
+                        help="check every engine against sklearn on the training data and time single rows")
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    export_forest(model, args.output)
+    print(f"💾 Flat forest exported to: {args.output}")
+    if not args.verify:
+        return
+
+    X = load_frame(TRAIN_SELECTED)[list(model.feature_names_in_)]
+    print(f"sklearn single row: {single_row_latency(model.predict, X.iloc[:1], calls=50) * 1e6:10.1f} µs")
+    for engine in ENGINES:
+        flat = FlatForest.load(args.output, engine=engine)
+        error = max_abs_error(model, flat, X)
+        latency = single_row_latency(flat.predict, X.iloc[:1])
+        print(f"{engine:<7} max |Δ| vs sklearn: {error:.2e}   single row: {latency * 1e6:10.1f} µs")
+        if error > VERIFY_TOLERANCE:
+            raise SystemExit(f"❌ {engine} engine differs from sklearn by {error:.2e}")
+    print("✅ Flat forest matches sklearn on every engine.")
+
+
+if __name__ == "__main__":
+    main()
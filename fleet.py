@@ -0,0 +1,91 @@
+"""
+fleet.py
+
+Fleet-snapshot scoring: score only the latest cycle of every unit, not its whole history.
+
+What it does:
+- `last_cycle_per_unit(df)` picks each unit's latest cycle in one sorted pass — no groupby + merge.
+  Data already ordered by (unit, cycle), like CMAPSS exports, is not even re-sorted.
+- `score_fleet(loaded, df)` scores those rows only and returns a table of units ranked by
+  predicted RUL (most urgent first) with a maintenance status per unit, the per-tree interval
+  (RUL_p10/RUL_p90) and the risk P(RUL < RISK_THRESHOLD) from uncertainty.py.
+- `fleet_snapshot(chunks)` does the same selection over an iterator of chunks, keeping only
+  O(number of units) rows in memory.
+
+This turns a full-history prediction (millions of rows) into one row per unit for the daily
+maintenance-planning view.
+"""
+
+import numpy as np
+import pandas as pd
+
+from config import MODERATE_RUL, URGENT_RUL
+from feature_engineering import ensure_features
+from uncertainty import predict_with_uncertainty, round_summary
+
+
+def _is_sorted(units, cycles):
+    if len(units) < 2:
+        return True
+    unit_step = np.diff(units)
+    same_unit = unit_step == 0
+    return bool((unit_step >= 0).all() and (np.diff(cycles)[same_unit] >= 0).all())
+
+
+def last_cycle_per_unit(df):
+    """Rows holding the latest cycle of each unit, ordered by unit."""
+    if df.empty:
+        return df
+    units = df['unit'].to_numpy()
+    cycles = df['cycle'].to_numpy()
+
+    order = None
+    if not _is_sorted(units, cycles):
+        order = np.lexsort((cycles, units))
+        units = units[order]
+
+    # Last row of each contiguous unit block
+    last = np.flatnonzero(np.r_[units[1:] != units[:-1], True])
+    if order is not None:
+        last = order[last]
+    return df.iloc[last]
+
+
+def fleet_snapshot(chunks):
+    """Latest cycle per unit across an iterator of DataFrame chunks (bounded memory)."""
+    latest = None
+    for chunk in chunks:
+        candidates = last_cycle_per_unit(chunk)
+        latest = candidates if latest is None else last_cycle_per_unit(pd.concat([latest, candidates]))
+    if latest is None:
+        raise ValueError("No rows to build a fleet snapshot from.")
+    return latest.reset_index(drop=True)
+
+
+def maintenance_status(rul):
+    """Vectorized 'urgent' / 'moderate' / 'healthy' labels, same thresholds as the UI."""
+    rul = np.asarray(rul)
+    return np.select([rul < URGENT_RUL, rul < MODERATE_RUL], ["urgent", "moderate"], default="healthy")
+
+
+def rank_fleet(snapshot, predictions):
+    """Units ranked by predicted RUL, most urgent first; `predictions` is an array or an uncertainty summary frame."""
+    ranked = snapshot[['unit', 'cycle']].copy()
+    if isinstance(predictions, pd.DataFrame):
+        for col, values in round_summary(predictions).items():
+            ranked[col] = values.to_numpy()
+    else:
+        ranked['RUL_pred'] = np.round(predictions, 2)
+    ranked['status'] = maintenance_status(ranked['RUL_pred'])
+    ranked = ranked.sort_values('RUL_pred', kind='stable').reset_index(drop=True)
+    ranked.insert(0, 'rank', np.arange(1, len(ranked) + 1))
+    return ranked
+
+
+def score_fleet(loaded, df):
+    """Score each unit's latest cycle with a `model_store.LoadedModel`; return the ranked table."""
+    # Rolling/EWMA model features come from each unit's history, so compute them first
+    df = ensure_features(df, loaded.feature_names)
+    snapshot = last_cycle_per_unit(df)
+    predictions = predict_with_uncertainty(loaded, loaded.layout.matrix(snapshot))
+    return rank_fleet(snapshot, predictions)
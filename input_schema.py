@@ -0,0 +1,228 @@
+"""
+input_schema.py
+
+Validation and column alignment of scoring inputs, compiled once per model.
+
+What it does:
+- `FeatureLayout` is built once per loaded model (model_store.py caches it next to the model):
+  feature order, name → column index, and float32 lower/upper bounds per feature.
+- `layout.matrix(records)` turns any incoming form straight into a contiguous (rows, features)
+  float32 matrix in model order, without building a DataFrame per request:
+    dict                      one record (the single-row / manual-entry path)
+    list of dicts             a JSON batch
+    pandas DataFrame          a CSV chunk (extra columns are ignored, order doesn't matter)
+    pyarrow RecordBatch/Table a Parquet/Arrow batch (columns are read zero-copy where possible)
+- Every matrix is checked in one vectorized pass: no NaN/inf, and (when the training ranges are
+  known) every value within INPUT_RANGE_MARGIN of the training span outside [min, max], and never
+  less than INPUT_RANGE_MIN_SLACK (a feature constant in training would otherwise accept one value).
+  The bounds come from FEATURE_RANGES_PATH, written next to the model by the training stage.
+- Problems raise `InputError`, a `ValueError` whose `.errors` is a list of structured entries
+  ({"code", "row", "feature", "message"}, at most MAX_REPORTED_ERRORS), so the CMMS integration
+  gets every problem of a request at once instead of a bare `KeyError`.
+
+Error codes: missing_feature, bad_record, not_numeric, not_finite, out_of_range.
+
+Rolling/EWMA model features (feature_engineering.py) come from each unit's history, which single rows
+don't carry. `layout.history_features` lists them; `layout.require_row_scoring(columns)` raises a
+`ValueError` naming the history-aware paths (score.py --fleet, UnitStateStore) when they are missing,
+so row-level callers fail once, up front, instead of on every row.
+
+Usage:
+    layout = FeatureLayout.from_model(model)          # or `get_model(path).layout`
+    X = layout.matrix({"sensor_14": 47.5, ...})       # (1, n_features) float32
+    X = layout.matrix(chunk_df)                       # (len(chunk_df), n_features) float32
+    X = layout.matrix(chunk_df, row_offset=start)     # error rows counted from the start of the file
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from config import FEATURE_RANGES_PATH, INPUT_RANGE_MARGIN, INPUT_RANGE_MIN_SLACK
+from feature_engineering import parse_feature
+
+MAX_REPORTED_ERRORS = 20
+
+
+class InputError(ValueError):
+    """Scoring input that does not fit the model's feature layout; `.errors` lists each problem."""
+
+    def __init__(self, errors, total=None):
+        self.errors = list(errors)[:MAX_REPORTED_ERRORS]
+        self.total = total if total is not None else len(errors)
+        first = self.errors[0]["message"] if self.errors else "Invalid input."
+        more = f" (+{self.total - 1} more)" if self.total > 1 else ""
+        super().__init__(first + more)
+
+    def to_dict(self):
+        return {"error": str(self), "errors": self.errors, "total_errors": self.total}
+
+
+def _error(code, message, row=None, feature=None):
+    return {"code": code, "row": row, "feature": feature, "message": message}
+
+
+def feature_ranges(df, feature_names):
+    """{feature: [min, max]} over the training frame `df`."""
+    values = df[list(feature_names)].to_numpy(dtype=np.float64)
+    return {name: [float(low), float(high)]
+            for name, low, high in zip(feature_names, np.nanmin(values, axis=0), np.nanmax(values, axis=0))}
+
+
+def save_feature_ranges(ranges, path=FEATURE_RANGES_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(ranges, f, indent=2)
+
+
+def load_feature_ranges(path=FEATURE_RANGES_PATH):
+    """Recorded training ranges, or None if none were written."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+class FeatureLayout:
+    """A model's expected input columns and value bounds, precompiled for fast conversion."""
+
+    def __init__(self, feature_names, ranges=None, margin=INPUT_RANGE_MARGIN, min_slack=INPUT_RANGE_MIN_SLACK):
+        self.feature_names = [str(name) for name in feature_names]
+        self.index = {name: i for i, name in enumerate(self.feature_names)}
+        self.history_features = [name for name in self.feature_names if parse_feature(name)]
+        self.lower = np.full(len(self.feature_names), -np.inf, dtype=np.float32)
+        self.upper = np.full(len(self.feature_names), np.inf, dtype=np.float32)
+        if ranges and margin is not None:
+            for name, (low, high) in ranges.items():
+                if name in self.index:
+                    slack = max(margin * (high - low), min_slack)
+                    self.lower[self.index[name]] = low - slack
+                    self.upper[self.index[name]] = high + slack
+        self.has_ranges = bool(np.isfinite(self.lower).any() or np.isfinite(self.upper).any())
+
+    @classmethod
+    def from_model(cls, model, ranges_path=FEATURE_RANGES_PATH):
+        """Layout of a fitted model (`feature_names_in_`), bounded by the recorded training ranges."""
+        return cls(model.feature_names_in_, load_feature_ranges(ranges_path))
+
+    def midpoints(self):
+        """{feature: centre of its accepted range} (0.0 where unbounded), e.g. for sample inputs."""
+        bounded = np.isfinite(self.lower) & np.isfinite(self.upper)
+        centre = np.zeros(len(self.feature_names), dtype=np.float32)
+        centre[bounded] = (self.lower[bounded] + self.upper[bounded]) / 2
+        return {name: round(float(value), 4) for name, value in zip(self.feature_names, centre)}
+
+    def require_row_scoring(self, available=()):
+        """Raise `ValueError` if rolling/EWMA model features are missing from the column names `available`."""
+        missing = [name for name in self.history_features if name not in available]
+        if missing:
+            raise ValueError(
+                f"This model uses rolling/EWMA features computed from each unit's history ({', '.join(missing)}), "
+                "so rows of raw sensor readings cannot be scored one by one. Use `score.py --fleet`, "
+                "fleet.score_fleet or unit_state.UnitStateStore, or supply those columns precomputed.")
+
+    def matrix(self, records, row_offset=0):
+        """
+        Validated (rows, features) float32 matrix in model order from a dict, dicts, DataFrame or Arrow batch.
+
+        `row_offset` is added to the row numbers in errors, e.g. the position of a chunk in its file.
+        """
+        if isinstance(records, dict):
+            X = self._from_dicts([records], row_offset)
+        elif isinstance(records, pd.DataFrame):
+            X = self._from_frame(records, row_offset)
+        elif hasattr(records, "schema") and hasattr(records, "column"):
+            X = self._from_arrow(records)
+        elif isinstance(records, (list, tuple)):
+            X = self._from_dicts(records, row_offset)
+        else:
+            raise InputError([_error("bad_record", f"Unsupported input type {type(records).__name__}.")])
+        return self.check(X, row_offset)
+
+    def check(self, X, row_offset=0):
+        """Raise `InputError` for NaN/inf or out-of-range values in `X`; returns `X`."""
+        bad = ~np.isfinite(X)
+        if self.has_ranges:
+            with np.errstate(invalid="ignore"):
+                bad |= (X < self.lower) | (X > self.upper)
+        if not bad.any():
+            return X
+
+        errors = []
+        for row, col in np.argwhere(bad)[:MAX_REPORTED_ERRORS]:
+            name, value = self.feature_names[col], X[row, col]
+            row += row_offset
+            if not np.isfinite(value):
+                errors.append(_error("not_finite", f"Row {row}: '{name}' is {value}.", int(row), name))
+            else:
+                errors.append(_error(
+                    "out_of_range",
+                    f"Row {row}: '{name}' = {value:g} is outside the accepted range "
+                    f"[{self.lower[col]:g}, {self.upper[col]:g}].", int(row), name))
+        raise InputError(errors, total=int(bad.sum()))
+
+    def require(self, available, names=None):
+        """Raise `InputError` listing the columns `names` (default: the model features) missing from `available`."""
+        missing = [name for name in (self.feature_names if names is None else names) if name not in available]
+        if missing:
+            raise InputError([_error("missing_feature", f"Missing required feature '{name}'.", feature=name)
+                              for name in missing])
+
+    def _from_dicts(self, rows, row_offset=0):
+        names = self.feature_names
+        X = np.empty((len(rows), len(names)), dtype=np.float32)
+        try:
+            for i, row in enumerate(rows):
+                X[i] = np.fromiter((row[name] for name in names), dtype=np.float32, count=len(names))
+        except (KeyError, TypeError, ValueError):
+            raise InputError(self._record_errors(rows, row_offset))
+        return X
+
+    def _record_errors(self, rows, row_offset=0):
+        """Slow path, only after a fast conversion failed: name every bad record and value."""
+        errors = []
+        for i, row in enumerate(rows, start=row_offset):
+            if not isinstance(row, dict):
+                errors.append(_error("bad_record", f"Row {i} must be an object mapping feature names to values.", i))
+                continue
+            for name in self.feature_names:
+                if name not in row:
+                    errors.append(_error("missing_feature", f"Row {i} is missing required feature '{name}'.", i, name))
+                    continue
+                try:
+                    np.float32(row[name])
+                except (TypeError, ValueError):
+                    errors.append(_error("not_numeric", f"Row {i}: '{name}' = {row[name]!r} is not a number.",
+                                         i, name))
+            if len(errors) >= MAX_REPORTED_ERRORS:
+                break
+        return errors
+
+    def _from_frame(self, df, row_offset=0):
+        self.require(set(df.columns))
+        frame = df if list(df.columns) == self.feature_names else df[self.feature_names]
+        try:
+            return np.ascontiguousarray(frame.to_numpy(dtype=np.float32))
+        except (TypeError, ValueError):
+            errors = []
+            for name in self.feature_names:
+                numeric = pd.to_numeric(frame[name], errors="coerce")
+                for row in np.flatnonzero(numeric.isna() & frame[name].notna())[:MAX_REPORTED_ERRORS]:
+                    errors.append(_error("not_numeric", f"Row {row + row_offset}: '{name}' = {frame[name].iloc[row]!r} "
+                                                        f"is not a number.", int(row + row_offset), name))
+            raise InputError(errors)
+
+    def _from_arrow(self, batch):
+        self.require(set(batch.schema.names))
+        X = np.empty((batch.num_rows, len(self.feature_names)), dtype=np.float32)
+        for j, name in enumerate(self.feature_names):
+            column = batch.column(name)
+            try:
+                # Nulls become NaN, which `check` reports as not_finite
+                X[:, j] = column.to_numpy(zero_copy_only=False)
+            except (TypeError, ValueError):
+                raise InputError([_error("not_numeric", f"Column '{name}' has type {column.type}, expected numbers.",
+                                         feature=name)])
+        return X
@@ -0,0 +1,216 @@
+"""
+instrumentation.py
+
+Lightweight stage timing for the pipeline, the training scripts and the UIs.
+
+What it provides:
+- `stage_timer(name)`: context manager recording wall time, row count, and process RSS (before,
+  after) for a block. It yields the record dict, so the block can fill in `record["rows"]`.
+- `@timed(name)`: the same for a whole function. Rows default to the length of the first
+  DataFrame/array argument, or of the returned DataFrame/array.
+- Nested stages record their `parent`, so a slow pipeline stage breaks down into I/O,
+  correlation, tree building, etc.
+- Records are kept in memory (`RECORDS`, most recent 10,000). `enable_jsonl(path)` also appends
+  each record as one JSON line (METRICS_PATH in config.py by default). `prometheus_text(records)`
+  renders Prometheus exposition text.
+
+Opt-in profiling of top-level stages, via the PDM_PROFILE environment variable:
+- PDM_PROFILE=cprofile     dumps a cProfile `.prof` per stage into PROFILE_DIR (open with snakeviz/pstats)
+- PDM_PROFILE=tracemalloc  adds the peak traced Python/NumPy allocation (`traced_peak_mb`) to the record
+- both may be combined: PDM_PROFILE=cprofile,tracemalloc
+
+Usage:
+    PDM_PROFILE=cprofile python pipeline.py --force
+    python instrumentation.py outputs/metrics.jsonl                       # per-stage summary table
+    python instrumentation.py outputs/metrics.jsonl --format prometheus   # Prometheus text
+"""
+
+import argparse
+import cProfile
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+from config import METRICS_PATH, PROFILE_DIR
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_ENV = "PDM_PROFILE"
+
+RECORDS = deque(maxlen=10_000)
+_jsonl_path = None
+_jsonl_lock = threading.Lock()
+_local = threading.local()
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB (peak RSS where the current value is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, AttributeError):
+        if resource is None:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def enable_jsonl(path=METRICS_PATH):
+    """Also append every record to `path` as JSON lines (None disables the file sink)."""
+    global _jsonl_path
+    if path:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    _jsonl_path = path
+
+
+def _emit(record):
+    RECORDS.append(record)
+    if _jsonl_path:
+        line = json.dumps(record, default=str)
+        with _jsonl_lock, open(_jsonl_path, "a") as f:
+            f.write(line + "\n")
+
+
+def _profile_modes():
+    return {mode.strip().lower() for mode in os.environ.get(PROFILE_ENV, "").split(",") if mode.strip()}
+
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+
+@contextmanager
+def stage_timer(name, rows=None):
+    """Time the enclosed block as stage `name`; yields the record dict (set `record["rows"]` inside)."""
+    stack = _stack()
+    record = {"stage": name, "parent": stack[-1] if stack else None, "rows": rows, "pid": os.getpid()}
+
+    # Profilers are process-global, so only top-level stages are profiled
+    modes = _profile_modes() if not stack else set()
+    profiler = cProfile.Profile() if "cprofile" in modes else None
+    trace = "tracemalloc" in modes and not tracemalloc.is_tracing()
+
+    stack.append(name)
+    rss_before = current_rss_mb()
+    record["start"] = round(time.time(), 3)
+    if trace:
+        tracemalloc.start()
+    if profiler is not None:
+        profiler.enable()
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["seconds"] = round(time.perf_counter() - start, 6)
+        if profiler is not None:
+            profiler.disable()
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            record["profile"] = os.path.join(PROFILE_DIR, f"{name}-{int(record['start'] * 1000)}.prof")
+            profiler.dump_stats(record["profile"])
+        if trace:
+            record["traced_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+            tracemalloc.stop()
+        rss_after = current_rss_mb()
+        if rss_after is not None:
+            record["rss_mb"] = round(rss_after, 1)
+            record["rss_delta_mb"] = round(rss_after - rss_before, 1)
+        stack.pop()
+        _emit(record)
+
+
+def _row_count(args, result):
+    for value in (*args, result):
+        if hasattr(value, "shape") and len(getattr(value, "shape")):
+            return len(value)
+    return None
+
+
+def timed(name=None):
+    """Decorator form of `stage_timer`; the stage name defaults to the function name."""
+    def decorator(func):
+        stage = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage_timer(stage) as record:
+                result = func(*args, **kwargs)
+                record["rows"] = _row_count(args, result)
+            return result
+        return wrapper
+    return decorator
+
+
+def records_since(start):
+    """Records of stages that started at or after `start` (a `time.time()` value)."""
+    return [record for record in RECORDS if record["start"] >= round(start, 3)]
+
+
+def read_jsonl(path=METRICS_PATH):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summarize(records):
+    """Per-stage totals: {stage: {"calls", "seconds", "rows", "last_seconds", "rss_mb"}}, in first-seen order."""
+    summary = {}
+    for record in records:
+        entry = summary.setdefault(record["stage"], {"calls": 0, "seconds": 0.0, "rows": 0})
+        entry["calls"] += 1
+        entry["seconds"] += record["seconds"]
+        entry["rows"] += record.get("rows") or 0
+        entry["last_seconds"] = record["seconds"]
+        if record.get("rss_mb") is not None:
+            entry["rss_mb"] = record["rss_mb"]
+    return summary
+
+
+def prometheus_text(records):
+    """Prometheus exposition text for `records` (counters per stage plus last-seen gauges)."""
+    summary = summarize(records)
+    metrics = [
+        ("pdm_stage_calls_total", "counter", "Number of times the stage ran.", "calls"),
+        ("pdm_stage_seconds_total", "counter", "Total wall time spent in the stage.", "seconds"),
+        ("pdm_stage_rows_total", "counter", "Rows processed by the stage.", "rows"),
+        ("pdm_stage_last_seconds", "gauge", "Wall time of the most recent run.", "last_seconds"),
+        ("pdm_stage_rss_mb", "gauge", "Process RSS after the most recent run, in MB.", "rss_mb"),
+    ]
+    lines = []
+    for metric, kind, help_text, key in metrics:
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+        for stage, entry in summary.items():
+            if entry.get(key) is not None:
+                lines.append(f'{metric}{{stage="{stage}"}} {entry[key]:g}')
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize recorded stage metrics")
+    parser.add_argument("path", nargs="?", default=METRICS_PATH, help="JSON lines file written by enable_jsonl()")
+    parser.add_argument("--format", choices=["table", "prometheus"], default="table")
+    args = parser.parse_args()
+
+    records = read_jsonl(args.path)
+    if args.format == "prometheus":
+        print(prometheus_text(records), end="")
+        return
+
+    print(f"{'stage':<28} {'calls':>6} {'total s':>10} {'last s':>10} {'rows':>12} {'rss MB':>9}")
+    for stage, entry in summarize(records).items():
+        rss = entry.get("rss_mb")
+        print(f"{stage:<28} {entry['calls']:>6} {entry['seconds']:>10.3f} {entry['last_seconds']:>10.3f} "
+              f"{entry['rows']:>12,} {rss if rss is not None else '-':>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+model_backends.py
+
+Pluggable registry of RUL model backends.
+
+Every backend is a factory returning an unfitted scikit-learn-compatible regressor, so whatever
+it builds exposes the `fit` / `predict` / `feature_names_in_` surface that train_rul_baseline.py,
+app.py and predict.py rely on.
+
+Built-in backends:
+- "random_forest"          sklearn RandomForestRegressor (RF_PARAMS) — the original baseline
+- "hist_gradient_boosting" sklearn HistGradientBoostingRegressor (HGB_PARAMS) — binned-histogram
+                           boosting; trains much faster and produces a far smaller model
+- "lightgbm"               lightgbm.LGBMRegressor (LGBM_PARAMS), only if lightgbm is installed
+
+Register another one with:
+
+    @register_backend("my_model")
+    def _my_model(params):
+        return MyRegressor(**params)
+"""
+
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+
+from config import BACKEND_PARAMS, MODEL_BACKEND
+
+MODEL_BACKENDS = {}
+
+
+def register_backend(name):
+    """Decorator registering `factory(params) -> estimator` under `name`."""
+    def decorator(factory):
+        MODEL_BACKENDS[name] = factory
+        return factory
+    return decorator
+
+
+def get_backend(name):
+    if name not in MODEL_BACKENDS:
+        raise ValueError(f"Unknown model backend '{name}'. Available: {sorted(MODEL_BACKENDS)}")
+    return MODEL_BACKENDS[name]
+
+
+def make_model(backend=MODEL_BACKEND, params=None):
+    """Unfitted estimator for `backend`, from its config defaults plus `params` overrides."""
+    factory = get_backend(backend)
+    return factory({**BACKEND_PARAMS.get(backend, {}), **(params or {})})
+
+
+@register_backend("random_forest")
+def _random_forest(params):
+    return RandomForestRegressor(**params)
+
+
+@register_backend("hist_gradient_boosting")
+def _hist_gradient_boosting(params):
+    return HistGradientBoostingRegressor(**params)
+
+
+@register_backend("lightgbm")
+def _lightgbm(params):
+    try:
+        from lightgbm import LGBMRegressor
+    except ImportError as e:
+        raise ImportError("The 'lightgbm' backend requires `pip install lightgbm`.") from e
+    return LGBMRegressor(**params)
@@ -0,0 +1,230 @@
+"""
+model_search.py
+
+Grouped-by-unit cross-validation and successive-halving hyperparameter search, run in a process pool.
+
+What it does:
+- Splits the training data with GroupKFold on `unit`, so no engine contributes rows to both the
+  training and the validation side of a fold (row-level K-fold leaks an engine's own history).
+- Writes the training matrix, target, and unit codes once as `.npy` files. Every worker opens
+  them with `np.load(mmap_mode="r")`, so the pool shares one read-only copy through the page cache
+  instead of pickling the data to each worker. Tasks only carry (candidate, fold, unit fraction).
+- Runs every (candidate, fold) pair of a rung concurrently, one single-threaded model per worker.
+- Successive halving: the first rung trains each candidate on SEARCH_MIN_UNIT_FRAC of each fold's
+  training units. Only the best 1/SEARCH_HALVING_FACTOR of candidates move on to the next rung,
+  which uses SEARCH_HALVING_FACTOR times more units, until the survivors are evaluated on all units.
+  Bad configurations are dropped after the cheapest rung.
+
+Candidates come from SEARCH_SPACE[backend] (config.py). `--n-candidates N` samples N of them at random.
+Results (every rung, every candidate's fold RMSEs, and the best parameters) go to SEARCH_RESULTS_PATH.
+
+Usage:
+    python model_search.py [--backend random_forest] [--folds 5] [--workers N] [--n-candidates N]
+    python model_search.py --cv-only    # grouped K-fold RMSE of the configured parameters only
+"""
+
+import argparse
+import json
+import math
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import GroupKFold, ParameterGrid, ParameterSampler
+from threadpoolctl import threadpool_limits
+
+from config import (
+    IMPORTANCE_RANKING_PATH,
+    MODEL_BACKEND,
+    SEARCH_FOLDS,
+    SEARCH_HALVING_FACTOR,
+    SEARCH_MIN_UNIT_FRAC,
+    SEARCH_RESULTS_PATH,
+    SEARCH_SPACE,
+    TRAIN_SELECTED,
+)
+from feature_selection import load_selected_features
+from instrumentation import enable_jsonl, stage_timer
+from model_backends import MODEL_BACKENDS, make_model
+from schema import load_frame
+
+_worker = {}
+
+
+def write_shared_matrix(df, feature_cols, folder):
+    """Save X (float32), y and unit codes as `.npy` files under `folder`; returns their paths."""
+    units, _ = pd.factorize(df['unit'])
+    arrays = {
+        "X": np.ascontiguousarray(df[feature_cols].to_numpy(dtype=np.float32)),
+        "y": df['RUL'].to_numpy(dtype=np.float64),
+        "groups": units.astype(np.int64),
+    }
+    paths = {}
+    for name, values in arrays.items():
+        paths[name] = os.path.join(folder, f"{name}.npy")
+        np.save(paths[name], values)
+    return paths
+
+
+def _init_worker(paths, backend, n_folds, seed):
+    # One model per process: keep BLAS/OpenMP single-threaded so workers don't oversubscribe cores
+    threadpool_limits(1)
+    X = np.load(paths["X"], mmap_mode="r")
+    y = np.load(paths["y"], mmap_mode="r")
+    groups = np.load(paths["groups"], mmap_mode="r")
+    # Fixed random order of units: a rung with fraction f trains on the first f of each fold's units
+    unit_rank = np.random.default_rng(seed).permutation(int(groups.max()) + 1)
+    _worker.update(
+        X=X, y=y, groups=groups, backend=backend, unit_rank=unit_rank,
+        folds=list(GroupKFold(n_splits=n_folds).split(X, y, groups)),
+    )
+
+
+def _evaluate(task):
+    """Fit one candidate on one fold (optionally on a fraction of its units); returns its RMSE."""
+    candidate, params, fold, unit_frac = task
+    X, y, groups = _worker["X"], _worker["y"], _worker["groups"]
+    train, valid = _worker["folds"][fold]
+    if unit_frac < 1.0:
+        n_units = len(_worker["unit_rank"])
+        train = train[_worker["unit_rank"][groups[train]] < unit_frac * n_units]
+
+    start = time.perf_counter()
+    model = make_model(_worker["backend"], params)
+    if "n_jobs" in model.get_params():
+        model.set_params(n_jobs=1)
+    model.fit(X[train], y[train])
+    residuals = model.predict(X[valid]) - y[valid]
+    return candidate, fold, float(np.sqrt(np.mean(residuals ** 2))), time.perf_counter() - start
+
+
+def halving_rungs(n_candidates, factor=SEARCH_HALVING_FACTOR, min_unit_frac=SEARCH_MIN_UNIT_FRAC):
+    """Unit fractions per rung, cheapest first and ending at 1.0."""
+    n_rungs = 1 + max(0, math.ceil(math.log(max(n_candidates, 1), factor)))
+    fracs = [round(min(1.0, min_unit_frac * factor ** rung), 6) for rung in range(n_rungs)]
+    fracs[-1] = 1.0
+    return sorted(set(fracs))
+
+
+class SearchPool:
+    """Process pool whose workers share the memory-mapped training matrix."""
+
+    def __init__(self, df, feature_cols, backend=MODEL_BACKEND, n_folds=SEARCH_FOLDS, workers=None, seed=0):
+        self._tmp = tempfile.TemporaryDirectory(prefix="pdm_search_")
+        paths = write_shared_matrix(df, feature_cols, self._tmp.name)
+        self.n_folds = n_folds
+        self.pool = ProcessPoolExecutor(workers or os.cpu_count() or 1, initializer=_init_worker,
+                                        initargs=(paths, backend, n_folds, seed))
+
+    def evaluate(self, candidates, unit_frac=1.0):
+        """Fold RMSEs of every candidate: {candidate index: [rmse per fold]}, run concurrently."""
+        tasks = [(i, params, fold, unit_frac) for i, params in candidates.items() for fold in range(self.n_folds)]
+        scores = {i: [None] * self.n_folds for i in candidates}
+        for candidate, fold, rmse, _ in self.pool.map(_evaluate, tasks):
+            scores[candidate][fold] = rmse
+        return scores
+
+    def close(self):
+        self.pool.shutdown()
+        self._tmp.cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def cross_validate(df, feature_cols, params=None, backend=MODEL_BACKEND, n_folds=SEARCH_FOLDS, workers=None):
+    """Grouped-by-unit K-fold RMSEs of one configuration (folds run in parallel)."""
+    with SearchPool(df, feature_cols, backend, n_folds, workers) as pool:
+        return pool.evaluate({0: params or {}})[0]
+
+
+def candidate_params(backend=MODEL_BACKEND, n_candidates=None, seed=0):
+    """Parameter dicts from SEARCH_SPACE[backend]: the full grid, or `n_candidates` sampled from it."""
+    space = SEARCH_SPACE[backend]
+    grid = ParameterGrid(space)
+    if n_candidates is None or n_candidates >= len(grid):
+        return list(grid)
+    return list(ParameterSampler(space, n_candidates, random_state=seed))
+
+
+def successive_halving(df, feature_cols, candidates, backend=MODEL_BACKEND, n_folds=SEARCH_FOLDS,
+                       factor=SEARCH_HALVING_FACTOR, min_unit_frac=SEARCH_MIN_UNIT_FRAC, workers=None, log=print):
+    """Search `candidates` (list of param dicts); returns a results dict with every rung and the best params."""
+    alive = dict(enumerate(candidates))
+    rungs = []
+    with SearchPool(df, feature_cols, backend, n_folds, workers) as pool:
+        for unit_frac in halving_rungs(len(candidates), factor, min_unit_frac):
+            with stage_timer(f"search_rung_{len(rungs)}") as timing:
+                scores = pool.evaluate(alive, unit_frac)
+                timing["rows"] = len(alive) * n_folds
+            mean_rmse = {i: float(np.mean(folds)) for i, folds in scores.items()}
+            ranked = sorted(alive, key=mean_rmse.get)
+            rungs.append({
+                "unit_frac": unit_frac,
+                "seconds": timing["seconds"],
+                "candidates": [
+                    {"params": alive[i], "mean_rmse": mean_rmse[i], "fold_rmse": scores[i]} for i in ranked
+                ],
+            })
+            log(f"🔎 Rung {len(rungs)}: {len(alive)} candidates on {unit_frac:.0%} of units, "
+                f"best RMSE {mean_rmse[ranked[0]]:.2f} ({timing['seconds']:.1f} s)")
+            if unit_frac >= 1.0:
+                break
+            alive = {i: alive[i] for i in ranked[:max(1, math.ceil(len(ranked) / factor))]}
+
+    best = rungs[-1]["candidates"][0]
+    return {
+        "backend": backend,
+        "features": list(feature_cols),
+        "folds": n_folds,
+        "best_params": best["params"],
+        "best_mean_rmse": best["mean_rmse"],
+        "rungs": rungs,
+    }
+
+
+def save_results(results, path=SEARCH_RESULTS_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, default=str)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grouped K-fold CV and successive-halving hyperparameter search")
+    parser.add_argument("--backend", default=MODEL_BACKEND, choices=sorted(MODEL_BACKENDS))
+    parser.add_argument("--folds", type=int, default=SEARCH_FOLDS)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--n-candidates", type=int, default=None, help="sample this many configs from the grid")
+    parser.add_argument("--cv-only", action="store_true", help="only cross-validate the configured parameters")
+    args = parser.parse_args()
+    enable_jsonl()
+
+    df_train = load_frame(TRAIN_SELECTED)
+    if os.path.exists(IMPORTANCE_RANKING_PATH):
+        feature_cols = load_selected_features(IMPORTANCE_RANKING_PATH)
+    else:
+        feature_cols = [col for col in df_train.columns if col not in ('unit', 'cycle', 'RUL')]
+
+    if args.cv_only:
+        fold_rmse = cross_validate(df_train, feature_cols, backend=args.backend, n_folds=args.folds,
+                                   workers=args.workers)
+        print(f"✅ {args.folds}-fold grouped CV RMSE: {np.mean(fold_rmse):.2f} ± {np.std(fold_rmse):.2f}",
+              [round(rmse, 2) for rmse in fold_rmse])
+        return
+
+    candidates = candidate_params(args.backend, args.n_candidates)
+    print(f"🔎 Searching {len(candidates)} {args.backend} configurations with {args.folds}-fold grouped CV")
+    results = successive_halving(df_train, feature_cols, candidates, args.backend, args.folds, workers=args.workers)
+    save_results(results)
+    print(f"✅ Best mean RMSE {results['best_mean_rmse']:.2f} with {results['best_params']}")
+    print(f"💾 Search results saved at: {SEARCH_RESULTS_PATH}")
+
+
+if __name__ == "__main__":
+    main()
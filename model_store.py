@@ -0,0 +1,110 @@
+"""
+model_store.py
+
+Process-wide cache of loaded models, shared by every Streamlit rerun and session in a process.
+
+What it does:
+- `load_model(path)` loads any of the model formats the project produces:
+  `.npz` (flat forest, memory-mapped), `.joblib.gz` (gzip + joblib), or plain `.joblib`.
+- `get_model(path)` returns a cached `LoadedModel` and only reloads it when the file's
+  modification time or size changes (e.g. after the pipeline retrains the model).
+- `save_model_metrics` / `load_model_metrics`: the backend and holdout RMSE recorded by the training
+  run (MODEL_METRICS_PATH), so the UIs show the current model's figure instead of a hard-coded one.
+- `LoadedModel` also holds the derived input layout (`feature_names`, `feature_index`, and the
+  validating `layout` from input_schema.py), so the UIs don't recompute it on every widget interaction.
+
+Streamlit re-executes the app script on each interaction but keeps imported modules, so this
+module-level registry survives reruns and is shared across sessions (thread-safe).
+"""
+
+import gzip
+import json
+import os
+import threading
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from config import MODEL_METRICS_PATH, MODEL_NPZ_PATH, MODEL_OUTPUT_PATH
+from flat_forest import FlatForest
+from input_schema import FeatureLayout
+from instrumentation import timed
+
+_MODELS = {}
+_LOCK = threading.Lock()
+
+
+def default_model_path():
+    """The flat `.npz` export if it exists, otherwise the joblib model (non-forest backends remove the export)."""
+    return MODEL_NPZ_PATH if os.path.exists(MODEL_NPZ_PATH) else MODEL_OUTPUT_PATH
+
+
+def save_model_metrics(metrics, path=MODEL_METRICS_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(metrics, f, indent=2)
+
+
+def load_model_metrics(path=MODEL_METRICS_PATH):
+    """Metrics recorded by the last training run ({"backend", "holdout_rmse"}), or None if none were written."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def file_signature(path):
+    """Cheap change detector for a model file: (mtime in ns, size in bytes)."""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+@timed("model_load")
+def load_model(path):
+    """Load a model from `.npz`, `.joblib.gz`, or `.joblib` without any caching."""
+    if path.endswith(".npz"):
+        return FlatForest.load(path)
+    if path.endswith(".gz"):
+        with gzip.open(path, "rb") as f:
+            return joblib.load(f)
+    return joblib.load(path)
+
+
+class LoadedModel:
+    """A loaded model plus its expected input layout."""
+
+    def __init__(self, model, path, signature):
+        self.model = model
+        self.path = path
+        self.signature = signature
+        self.layout = FeatureLayout.from_model(model)
+        self.feature_names = self.layout.feature_names
+        self.feature_index = self.layout.index
+
+    def predict(self, X):
+        """Predict a DataFrame or a matrix whose columns follow `feature_names`."""
+        if not isinstance(self.model, FlatForest) and isinstance(X, np.ndarray):
+            # sklearn estimators fitted on DataFrames expect named columns
+            X = pd.DataFrame(X, columns=self.feature_names)
+        return self.model.predict(X)
+
+
+def get_model(path):
+    """Cached `LoadedModel` for `path`, reloaded only if the file changed on disk."""
+    signature = file_signature(path)
+    entry = _MODELS.get(path)
+    if entry is not None and entry.signature == signature:
+        return entry
+
+    with _LOCK:
+        entry = _MODELS.get(path)
+        if entry is None or entry.signature != signature:
+            entry = LoadedModel(load_model(path), path, signature)
+            _MODELS[path] = entry
+    return entry
+
+
+def clear_cache():
+    with _LOCK:
+        _MODELS.clear()
@@ -0,0 +1,326 @@
+"""
+pipeline.py
+
+In-process pipeline runner that replaces the chain of `subprocess.run(["python", ...])` calls.
+
+Stages (each declares its inputs, outputs, and parameters):
+1. preprocess        raw PM_train.txt            -> df_train (with RUL)
+2. correlation_select df_train                   -> df_train_selected (top-N correlated sensors, plus
+                                                    rolling/EWMA features when ROLLING_FEATURES is on),
+                                                    outputs/correlation_stats.json, outputs/feature_ranking.json
+3. importance_refine df_train_selected           -> df_test_selected (top-5 by RF importance)
+   eda_stats         df_train, importance ranking -> outputs/eda_stats.npz (correlations, lifetimes and
+                                                    downsampled traces for eda/report.py)
+4. train             df_train_selected, df_test_selected, truth -> model, outputs/model_metrics.json
+                                                    (backend and holdout RMSE, shown by predict.py)
+   feature_ranges    df_train_selected, importance ranking -> training min/max per model feature
+                                                    (input validation, input_schema.py)
+
+How caching works:
+- Every output is persisted to its usual path (dataset/*.csv, outputs/*.joblib) and content-hashed.
+  Frames are saved in compact dtypes with a schema sidecar (schema.py), so they reload as
+  float32/int16 instead of float64/int64.
+- A stage's cache key is the hash of its parameters plus the content hashes of its inputs.
+- If the key matches the one recorded in outputs/pipeline_manifest.json and the outputs on disk
+  still have the recorded hashes, the stage is skipped.
+- Every stage, and every artifact load/save inside it, is timed (instrumentation.py), so a slow
+  run shows whether the time went to I/O, correlation, or tree building.
+- DataFrames produced in this run are handed to the next stage in memory; outputs of skipped
+  stages are only read from disk if a downstream stage actually needs to run.
+
+Usage:
+    python pipeline.py [--force]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+
+import joblib
+
+from config import (
+    BACKEND_PARAMS,
+    CORRELATION_STATS_PATH,
+    EDA_STATS_PATH,
+    EDA_TRACE_POINTS,
+    EWMA_SPANS,
+    FEATURE_RANGES_PATH,
+    FEATURE_RANKING_PATH,
+    IMPORTANCE_RANKING_PATH,
+    IMPORTANCE_RF_PARAMS,
+    IMPORTANCE_SAMPLE_FRAC,
+    IMPORTANCE_TOP_K,
+    MODEL_BACKEND,
+    MODEL_METRICS_PATH,
+    MODEL_NPZ_PATH,
+    MODEL_OUTPUT_PATH,
+    RAW_TEST_PATH,
+    RAW_TRAIN_PATH,
+    ROLLING_FEATURES,
+    ROLLING_STATS,
+    ROLLING_WINDOWS,
+    RUL_CAP,
+    TEST_SELECTED,
+    TOP_N_FEATURES,
+    TRAIN_SELECTED,
+    TRAIN_WITH_RUL,
+    TRUTH_PATH,
+)
+from data_loader import file_sha1, load_cmapss, load_truth
+from eda_stats import compute_eda_stats, load_eda_stats, save_eda_stats
+from feature_engineering import add_rolling_features
+from feature_selection import correlation_moments, importance_ranking
+from flat_forest import export_forest, remove_export
+from input_schema import feature_ranges
+from instrumentation import enable_jsonl, stage_timer
+from model_store import load_model_metrics, save_model_metrics
+from preprocessing import add_rul, clean_columns
+from schema import downcast, load_frame, save_frame
+from select_top_features import build_selected_dataset
+from streaming import correlation_ranking, load_moments, save_moments
+from test_preprocessing import build_refined_dataset, rank_importance
+from train_rul_baseline import evaluate_holdout, train_model
+
+MANIFEST_PATH = "outputs/pipeline_manifest.json"
+
+
+class Artifact:
+    """A named stage input/output with its on-disk location and (de)serializers."""
+
+    def __init__(self, name, path, save=None, load=None):
+        self.name = name
+        self.path = path
+        self.save = save
+        self.load = load
+
+
+def _save_json(obj, path):
+    with open(path, "w") as f:
+        json.dump(obj, f, indent=2)
+
+
+def _load_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+class Stage:
+    """A pipeline step: `func(**inputs, **params)` returns a dict keyed by output name."""
+
+    def __init__(self, name, func, inputs, outputs, params=None):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = dict(params or {})
+
+    def cache_key(self, input_hashes):
+        payload = json.dumps(
+            {"stage": self.name, "params": self.params, "inputs": [input_hashes[name] for name in self.inputs]},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class Pipeline:
+    """Runs stages in declaration order (a linear DAG), skipping up-to-date ones."""
+
+    def __init__(self, artifacts, stages, manifest_path=MANIFEST_PATH):
+        self.artifacts = {artifact.name: artifact for artifact in artifacts}
+        self.stages = list(stages)
+        self.manifest_path = manifest_path
+        self._check_graph()
+
+    def _check_graph(self):
+        produced = {name for name, artifact in self.artifacts.items() if artifact.save is None}
+        for stage in self.stages:
+            missing = [name for name in stage.inputs if name not in produced]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' needs {missing} before any stage produces them.")
+            produced.update(stage.outputs)
+
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def _save_manifest(self, manifest):
+        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+        with open(self.manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+    def _up_to_date(self, record, key, outputs):
+        if record is None or record.get("key") != key:
+            return False
+        # A stage that gained an output since the manifest was written has to run to produce it
+        if set(outputs) - set(record["outputs"]):
+            return False
+        for name, digest in record["outputs"].items():
+            path = self.artifacts[name].path
+            if not os.path.exists(path) or file_sha1(path) != digest:
+                return False
+        return True
+
+    def run(self, force=False, log=print):
+        """Run the pipeline; returns the names of the stages that actually executed."""
+        manifest = self._load_manifest()
+        values = {}
+        hashes = {}
+        executed = []
+
+        # Source artifacts (raw files) are identified by their content hash
+        for name, artifact in self.artifacts.items():
+            if artifact.save is None:
+                hashes[name] = file_sha1(artifact.path)
+
+        def get_value(name):
+            if name not in values:
+                with stage_timer(f"load:{name}"):
+                    values[name] = self.artifacts[name].load(self.artifacts[name].path)
+            return values[name]
+
+        for stage in self.stages:
+            key = stage.cache_key(hashes)
+            record = manifest.get(stage.name)
+            if not force and self._up_to_date(record, key, stage.outputs):
+                hashes.update(record["outputs"])
+                log(f"⏭️  {stage.name}: up to date, skipped")
+                continue
+
+            log(f"▶️  {stage.name}: running")
+            with stage_timer(stage.name) as timing:
+                inputs = {name: get_value(name) for name in stage.inputs}
+                outputs = stage.func(**inputs, **stage.params)
+
+                record = {"key": key, "outputs": {}}
+                for name in stage.outputs:
+                    artifact = self.artifacts[name]
+                    os.makedirs(os.path.dirname(artifact.path) or ".", exist_ok=True)
+                    with stage_timer(f"save:{name}"):
+                        artifact.save(outputs[name], artifact.path)
+                    values[name] = outputs[name]
+                    hashes[name] = record["outputs"][name] = file_sha1(artifact.path)
+                timing["rows"] = next((len(value) for value in outputs.values() if hasattr(value, "shape")), None)
+            log(f"   {stage.name}: {timing['seconds']:.2f} s")
+
+            manifest[stage.name] = record
+            self._save_manifest(manifest)
+            executed.append(stage.name)
+
+        return executed
+
+
+# --- Stage functions ---
+
+def _preprocess(raw_train, rul_cap):
+    return {"df_train": downcast(add_rul(clean_columns(raw_train), cap=rul_cap))}
+
+
+def _correlation_select(df_train, top_n, rolling):
+    if rolling:
+        df_train = add_rolling_features(df_train, **rolling)
+    moments = correlation_moments(df_train)
+    ranking = correlation_ranking(moments.correlations(), top_n)
+    return {
+        "df_train_selected": build_selected_dataset(df_train, ranking["top_features"]),
+        "correlation_stats": moments,
+        "feature_ranking": ranking,
+    }
+
+
+def _importance_refine(df_train_selected, top_k, sample_frac, rf_params):
+    importances = rank_importance(df_train_selected, sample_frac=sample_frac, params=rf_params)
+    ranking = importance_ranking(importances, top_k)
+    return {
+        "df_test_selected": build_refined_dataset(df_train_selected, ranking["selected_features"]),
+        "importance_ranking": ranking,
+    }
+
+
+def _eda_stats(df_train, importance_ranking, points, top_n):
+    return {"eda_stats": compute_eda_stats(df_train, importance_ranking["selected_features"], points, top_n)}
+
+
+def _train(df_train_selected, importance_ranking, raw_test, truth, backend, params):
+    feature_cols = importance_ranking["selected_features"]
+    model = train_model(df_train_selected, feature_cols, params=params, backend=backend)
+    rmse = evaluate_holdout(model, raw_test, truth, feature_cols)
+    print("✅ RMSE:", rmse)
+    if not hasattr(model, "estimators_"):
+        # No export stage for this backend: an older forest's .npz would otherwise keep being served
+        remove_export(MODEL_NPZ_PATH)
+    return {"model": model, "model_metrics": {"backend": backend, "holdout_rmse": float(rmse)}}
+
+
+def _feature_ranges(df_train_selected, importance_ranking):
+    return {"feature_ranges": feature_ranges(df_train_selected, importance_ranking["selected_features"])}
+
+
+def _export(model):
+    return {"model_npz": model}
+
+
+def _rolling_params():
+    """Rolling-feature settings for the correlation stage (None when disabled), part of its cache key."""
+    if not ROLLING_FEATURES:
+        return None
+    return {"windows": list(ROLLING_WINDOWS), "stats": list(ROLLING_STATS), "ewma_spans": list(EWMA_SPANS)}
+
+
+def build_pipeline():
+    """The default preprocess → correlation select → importance refine → train pipeline."""
+    artifacts = [
+        Artifact("raw_train", RAW_TRAIN_PATH, load=load_cmapss),
+        Artifact("raw_test", RAW_TEST_PATH, load=load_cmapss),
+        Artifact("truth", TRUTH_PATH, load=load_truth),
+        Artifact("df_train", TRAIN_WITH_RUL, save=save_frame, load=load_frame),
+        Artifact("df_train_selected", TRAIN_SELECTED, save=save_frame, load=load_frame),
+        Artifact("correlation_stats", CORRELATION_STATS_PATH, save=save_moments, load=load_moments),
+        Artifact("feature_ranking", FEATURE_RANKING_PATH, save=_save_json, load=_load_json),
+        Artifact("df_test_selected", TEST_SELECTED, save=save_frame, load=load_frame),
+        Artifact("importance_ranking", IMPORTANCE_RANKING_PATH, save=_save_json, load=_load_json),
+        Artifact("eda_stats", EDA_STATS_PATH, save=save_eda_stats, load=load_eda_stats),
+        Artifact("feature_ranges", FEATURE_RANGES_PATH, save=_save_json, load=_load_json),
+        Artifact("model", MODEL_OUTPUT_PATH, save=joblib.dump, load=joblib.load),
+        Artifact("model_metrics", MODEL_METRICS_PATH, save=save_model_metrics, load=load_model_metrics),
+        Artifact("model_npz", MODEL_NPZ_PATH, save=export_forest),
+    ]
+    stages = [
+        Stage("preprocess", _preprocess, ["raw_train"], ["df_train"], {"rul_cap": RUL_CAP}),
+        Stage("correlation_select", _correlation_select, ["df_train"],
+              ["df_train_selected", "correlation_stats", "feature_ranking"],
+              {"top_n": TOP_N_FEATURES, "rolling": _rolling_params()}),
+        Stage("importance_refine", _importance_refine, ["df_train_selected"],
+              ["df_test_selected", "importance_ranking"],
+              {"top_k": IMPORTANCE_TOP_K, "sample_frac": IMPORTANCE_SAMPLE_FRAC, "rf_params": IMPORTANCE_RF_PARAMS}),
+        Stage("eda_stats", _eda_stats, ["df_train", "importance_ranking"], ["eda_stats"],
+              {"points": EDA_TRACE_POINTS, "top_n": TOP_N_FEATURES}),
+        Stage("train", _train, ["df_train_selected", "importance_ranking", "raw_test", "truth"],
+              ["model", "model_metrics"],
+              {"backend": MODEL_BACKEND, "params": BACKEND_PARAMS.get(MODEL_BACKEND, {})}),
+        Stage("feature_ranges", _feature_ranges, ["df_train_selected", "importance_ranking"], ["feature_ranges"]),
+    ]
+    if MODEL_BACKEND == "random_forest":
+        stages.append(Stage("export", _export, ["model"], ["model_npz"]))
+    return Pipeline(artifacts, stages)
+
+
+def run_pipeline(force=False, log=print):
+    """Build and run the default pipeline in this process."""
+    return build_pipeline().run(force=force, log=log)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the RUL pipeline, skipping up-to-date stages")
+    parser.add_argument("--force", action="store_true", help="re-run every stage")
+    args = parser.parse_args()
+    enable_jsonl()
+    executed = run_pipeline(force=args.force)
+    print(f"✅ Pipeline finished. Stages run: {executed or 'none (all up to date)'}")
+
+
+if __name__ == "__main__":
+    main()
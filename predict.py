@@ -4,31 +4,47 @@ predict.py
 This script launches a Streamlit-based user interface for interacting with the trained Random Forest model.
 
 What it does:
-- Loads a previously trained RUL (Remaining Useful Life) prediction model from the local file system.
+- Loads a previously trained RUL (Remaining Useful Life) prediction model from the local file system,
+  preferring the memory-mapped flat-array export (outputs/rf_rul_model.npz, see flat_forest.py)
+  and falling back to the gzip-compressed joblib pickle. The model is cached process-wide
+  (model_store.py), so Streamlit reruns don't reload it unless the file changes.
 - Provides two ways to input sensor readings: file upload (CSV) or manual entry via the UI.
-- Predicts the RUL based on the input values.
+- Predicts the RUL based on the input values, with the range spanned by the forest's trees and the
+  chance of RUL below the urgent threshold (uncertainty.py), from the same model pass.
 - Offers technician-friendly feedback depending on the predicted RUL severity.
 - Includes downloadable sample CSV for easy testing.
+- Validates uploads and manual entries with the model's precompiled feature layout (input_schema.py)
+  and lists every missing, non-numeric or out-of-range value.
+- Records model load and prediction timings (instrumentation.py, outputs/metrics.jsonl).
 
 This interface is ideal for local demos, pilot testing, or as a starting point for future production deployment.
 """
 
 import streamlit as st
 import pandas as pd
-import joblib
-import gzip
 import os
 
-# Load trained model (compressed .gz file)
+from config import MODERATE_RUL, PREDICTION_QUANTILES, URGENT_RUL
+from feature_engineering import ensure_features
+from input_schema import InputError
+from instrumentation import enable_jsonl, stage_timer
+from model_store import default_model_path, get_model, load_model_metrics
+from uncertainty import predict_with_uncertainty, quantile_column, risk_column, round_summary
+
+# Model load and prediction timings go to outputs/metrics.jsonl
+enable_jsonl()
+
+# Load trained model: the current pipeline model (flat .npz export for forests), else compressed .gz file
 MODEL_PATH = "outputs/rf_rul_model.joblib.gz"
 
-if not os.path.exists(MODEL_PATH):
-    st.error(f"Compressed model file not found at: {MODEL_PATH}")
+if os.path.exists(default_model_path()):
+    loaded = get_model(default_model_path())
+elif os.path.exists(MODEL_PATH):
+    loaded = get_model(MODEL_PATH)
+else:
+    st.error(f"Model file not found at: {default_model_path()} or {MODEL_PATH}")
     st.stop()
 
-with gzip.open(MODEL_PATH, "rb") as f:
-    model = joblib.load(f)
-
 # Streamlit UI
 st.title("Predict Remaining Useful Life (RUL)")
 st.markdown("Upload a CSV file with sensor readings or enter them manually to predict RUL.")
@@ -39,23 +55,28 @@ uploaded_file = st.file_uploader("Upload CSV file", type=["csv"])
 if uploaded_file:
     try:
         input_df = pd.read_csv(uploaded_file)
-        input_df = input_df[model.feature_names_in_]
-        prediction = model.predict(input_df)
-        st.success(f"Predicted RULs: {prediction.round(2).tolist()}")
-
+        if loaded.layout.history_features and {"unit", "cycle"} <= set(input_df.columns):
+            # Rolling/EWMA features from each unit's history in the file, as in training
+            input_df = ensure_features(input_df, loaded.feature_names)
+        loaded.layout.require_row_scoring(input_df.columns)
+        with stage_timer("predict_batch", rows=len(input_df)) as timing:
+            summary = predict_with_uncertainty(loaded, loaded.layout.matrix(input_df))
+        st.success(f"Predicted RULs for {len(summary):,} rows:")
+        st.dataframe(round_summary(summary), hide_index=True)
+        st.caption(f"Scored {len(input_df):,} rows in {timing['seconds'] * 1000:.1f} ms")
+
+    except InputError as e:
+        st.error(f"Invalid input: {e}")
+        st.dataframe(pd.DataFrame(e.errors), hide_index=True)
     except KeyError as e:
         st.error(f"Uploaded CSV is missing required columns: {e}")
+    except ValueError as e:
+        st.error(str(e))
     except Exception as e:
         st.error(f"Error reading file: {e}")
 
-# Sample input for download
-sample_data = pd.DataFrame([{
-    "sensor_14": 10.5,
-    "sensor_7": 0.5,
-    "sensor_18": 100.0,
-    "sensor_24": 20.0,
-    "sensor_6": 515.0
-}])
+# Sample input for download (mid-range values of the model's features, so it passes validation)
+sample_data = pd.DataFrame([loaded.layout.midpoints()])
 
 st.markdown("### Need a sample file?")
 st.download_button(
@@ -67,24 +88,38 @@ st.download_button(
 
 # Manual entry
 st.markdown("### Or enter values manually:")
+if loaded.layout.history_features:
+    st.info("This model uses rolling/EWMA features of each unit's history: enter them precomputed, "
+            "or upload a CSV with unit, cycle and the raw sensors instead.")
 manual_input = {}
-for feature in model.feature_names_in_:
-    manual_input[feature] = st.number_input(f"{feature}", step=0.1)
+defaults = loaded.layout.midpoints()
+for feature in loaded.feature_names:
+    manual_input[feature] = st.number_input(f"{feature}", value=defaults[feature], step=0.1)
 
 if st.button("Predict RUL"):
-    input_df = pd.DataFrame([manual_input])
-    input_df = input_df.astype(float)
-    input_df = input_df.reindex(columns=model.feature_names_in_, fill_value=0.0)
-    prediction = model.predict(input_df)[0]
-    rounded_rul = round(prediction, 2)
+    try:
+        X = loaded.layout.matrix(manual_input)
+    except InputError as e:
+        st.error(f"Invalid input: {e}")
+        st.dataframe(pd.DataFrame(e.errors), hide_index=True)
+        st.stop()
+    with stage_timer("predict_single", rows=1) as timing:
+        summary = predict_with_uncertainty(loaded, X, threshold=URGENT_RUL).iloc[0]
+    rounded_rul = round(summary["RUL_pred"], 2)
+    low, high = summary[quantile_column(PREDICTION_QUANTILES[0])], summary[quantile_column(PREDICTION_QUANTILES[-1])]
 
     # RUL display
     st.success(f"Predicted RUL: {rounded_rul} cycles")
+    if pd.notna(low):
+        st.markdown(f"Range across the model's trees ({PREDICTION_QUANTILES[-1] - PREDICTION_QUANTILES[0]:.0%}): "
+                    f"{low:.0f}–{high:.0f} cycles. Chance of RUL below {URGENT_RUL}: "
+                    f"{summary[risk_column(URGENT_RUL)]:.0%}")
+    st.caption(f"Predicted in {timing['seconds'] * 1000:.2f} ms")
 
     # Interpretation
-    if rounded_rul < 30:
+    if rounded_rul < URGENT_RUL:
         st.warning("Urgent: Component is nearing failure. Schedule maintenance immediately.")
-    elif rounded_rul < 80:
+    elif rounded_rul < MODERATE_RUL:
         st.info("Moderate wear: Plan preventive maintenance soon.")
     else:
         st.success("Component is in healthy range. No immediate action required.")
@@ -99,4 +134,9 @@ if st.button("Predict RUL"):
     """)
 
 st.markdown("---")
-st.caption("Model trained using Random Forest with RMSE ≈ 43.57 cycles. Built for technician insight and action.")
+metrics = load_model_metrics()
+if metrics:
+    st.caption(f"Model: {metrics['backend']}, holdout RMSE ≈ {metrics['holdout_rmse']:.2f} cycles. "
+               "Built for technician insight and action.")
+else:
+    st.caption("Built for technician insight and action.")
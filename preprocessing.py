@@ -1,66 +1,87 @@
 """
 preprocessing.py
 
-This script handles loading and preprocessing of the CMAPSS dataset used for Remaining Useful Life (RUL) prediction.
-
-What it does:
-- Loads raw training, test, and RUL truth files from the dataset folder.
-- Removes unnecessary empty columns caused by inconsistent spacing.
-- Assigns clear column names: unit ID, cycle number, and 24 sensor measurements.
-- Computes the Remaining Useful Life (RUL) for each row in the training set.
-- Converts the RUL truth values for the test set into a DataFrame with the correct structure.
-- Saves a reusable version of the processed training data to disk for downstream use.
-- Performs sanity checks with `.head()`, `.columns`, and `.shape` to verify data loading and structure.
-
-This script is the foundation of all modeling steps and must be run before feature selection or model training.
+This module handles loading and preprocessing of the CMAPSS dataset used for Remaining Useful Life (RUL) prediction.
+
+What it provides:
+- `load_raw(path)`: parses a raw training/test file with typed columns via data_loader.py (cached after the first run).
+- `clean_columns(df)`: removes empty columns caused by inconsistent spacing and assigns clear column names
+  (unit ID, cycle number, and 24 sensor measurements).
+- `add_rul(df)`: computes the Remaining Useful Life (RUL) for each row of a run-to-failure history.
+- `load_truth(path)`: converts the RUL truth values for the test set into a DataFrame with an `RUL` column.
+- `load_datasets()`: convenience wrapper returning the train (with RUL), test, and truth frames,
+  in compact dtypes (float32 sensors, int16/int32 ids and RUL; see schema.py).
+
+All functions are pure: they return data and never write to disk or print, so importing this
+module is cheap. Loading, RUL computation and the CSV write are timed (instrumentation.py). Run it as a script
+to save the processed training set for the downstream stages:
+
+    python preprocessing.py
+
+This is the foundation of all modeling steps and must run before feature selection or model training.
 """
 
-import pandas as pd
 import os
 
-# Define file paths
-dataset_folder = "dataset"  # Adjust this path if needed
-train_file = os.path.join(dataset_folder, "PM_train.txt")
-test_file = os.path.join(dataset_folder, "PM_test.txt")
-truth_file = os.path.join(dataset_folder, "PM_truth.txt")  # Contains actual RUL values for test set
-
-# Load datasets
-df_train = pd.read_csv(train_file, sep=" ", header=None, engine="python")
-df_test = pd.read_csv(test_file, sep=" ", header=None, engine="python")
-df_truth = pd.read_csv(truth_file, sep=" ", header=None, engine="python").iloc[:, 0]
-
-# Remove extra empty columns
-df_train.dropna(axis=1, how="all", inplace=True)
-df_test.dropna(axis=1, how="all", inplace=True)
-
-# Rename columns (1 unit ID + 1 cycle + 22 sensors)
-column_names = ["unit", "cycle"] + [f"sensor_{i}" for i in range(1, 24 + 1)]
-df_train.columns = column_names
-df_test.columns = column_names
-df_truth = df_truth.to_frame(name="RUL")
-
-# --- Compute RUL for Training Data ---
-rul_per_unit = df_train.groupby("unit")["cycle"].max().reset_index()
-rul_per_unit.columns = ["unit", "max_cycle"]
-df_train = df_train.merge(rul_per_unit, on="unit", how="left")
-df_train["RUL"] = df_train["max_cycle"] - df_train["cycle"]
-df_train.drop(columns=["max_cycle"], inplace=True)
-
-# (Optional) Save preprocessed training set for reuse
-df_train.to_csv(os.path.join(dataset_folder, "df_train_with_rul.csv"), index=False)
-
-# --- Output Checks ---
-print("✅ Train dataset (with RUL):")
-print(df_train.head())
-print(df_train.columns)
-print(df_train.shape)
-
-print("\n✅ Test dataset:")
-print(df_test.head())
-print(df_test.columns)
-print(df_test.shape)
-
-print("\n✅ Truth RUL values:")
-print(df_truth.head())
-print(df_truth.columns)
-print(df_truth.shape)
+from compute_rul import compute_rul
+from config import RAW_TEST_PATH, RAW_TRAIN_PATH, RUL_CAP, TRAIN_WITH_RUL, TRUTH_PATH
+from data_loader import COLUMN_NAMES, load_cmapss, load_truth
+from instrumentation import enable_jsonl, stage_timer
+from schema import downcast, save_frame
+
+
+def load_raw(path):
+    """Load a raw CMAPSS sensor file as a typed DataFrame."""
+    return load_cmapss(path)
+
+
+def clean_columns(df):
+    """Drop all-empty columns and name the remaining ones (unit, cycle, sensor_1..sensor_24)."""
+    df = df.dropna(axis=1, how="all")
+    if list(df.columns) != COLUMN_NAMES:
+        df = df.set_axis(COLUMN_NAMES, axis=1)
+    return df
+
+
+def add_rul(df, cap=RUL_CAP):
+    """Return a copy of `df` with an `RUL` column computed from each unit's last cycle."""
+    return compute_rul(df, cap=cap)
+
+
+def load_datasets(train_path=RAW_TRAIN_PATH, test_path=RAW_TEST_PATH, truth_path=TRUTH_PATH):
+    """Load train (with RUL), test, and truth DataFrames."""
+    df_train = downcast(add_rul(clean_columns(load_raw(train_path))))
+    df_test = clean_columns(load_raw(test_path))
+    df_truth = load_truth(truth_path)
+    return df_train, df_test, df_truth
+
+
+def main():
+    enable_jsonl()
+    df_train, df_test, df_truth = load_datasets()
+
+    # Save preprocessed training set for reuse
+    os.makedirs(os.path.dirname(TRAIN_WITH_RUL), exist_ok=True)
+    with stage_timer("save_train_with_rul", rows=len(df_train)):
+        save_frame(df_train, TRAIN_WITH_RUL)
+    print(f"✅ Saved training set with RUL to: {TRAIN_WITH_RUL}")
+
+    # --- Output Checks ---
+    print("✅ Train dataset (with RUL):")
+    print(df_train.head())
+    print(df_train.columns)
+    print(df_train.shape)
+
+    print("\n✅ Test dataset:")
+    print(df_test.head())
+    print(df_test.columns)
+    print(df_test.shape)
+
+    print("\n✅ Truth RUL values:")
+    print(df_truth.head())
+    print(df_truth.columns)
+    print(df_truth.shape)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+schema.py
+
+Compact dtypes for every DataFrame the pipeline persists, and schema sidecars that keep them.
+
+What it does:
+- `downcast(df)`: float columns to float32, integer columns (`unit`, `cycle`, `RUL`) to the
+  smallest of int16/int32/int64 that holds their values. About half the memory of the float64/int64
+  frames pandas produces by default, and sklearn's trees work in float32 internally anyway.
+- `save_frame(df, path)`: writes the (downcast) CSV plus `<path>.schema.json` with its columns,
+  dtypes and row count.
+- `load_frame(path)`: reads the CSV back with exactly those dtypes (no float64/int64 detour) and
+  raises `SchemaError` if the file no longer matches its schema. Files without a sidecar are
+  read and downcast.
+
+The intermediate CSVs (df_train_with_rul.csv, df_train_selected.csv, df_test_selected.csv) stay
+plain CSV for the EDA scripts and spreadsheets; the sidecar only adds the type information.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+_INT_DTYPES = (np.int16, np.int32, np.int64)
+
+
+class SchemaError(ValueError):
+    """A persisted frame does not match the columns or dtypes recorded for it."""
+
+
+def schema_path(path):
+    return path + ".schema.json"
+
+
+def _smallest_int(values):
+    if len(values) == 0:
+        return _INT_DTYPES[0]
+    low, high = values.min(), values.max()
+    for dtype in _INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return np.int64
+
+
+def downcast(df):
+    """Float columns to float32, integer columns to the smallest fitting int."""
+    dtypes = {}
+    for col in df.columns:
+        dtype = df[col].dtype
+        if pd.api.types.is_float_dtype(dtype) and dtype != np.float32:
+            dtypes[col] = np.float32
+        elif pd.api.types.is_integer_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+            target = _smallest_int(df[col].to_numpy())
+            if dtype != target:
+                dtypes[col] = target
+    return df.astype(dtypes) if dtypes else df
+
+
+def frame_schema(df):
+    """{"columns": [...], "dtypes": {column: dtype name}, "n_rows": int} for `df`."""
+    return {
+        "columns": [str(col) for col in df.columns],
+        "dtypes": {str(col): str(dtype) for col, dtype in df.dtypes.items()},
+        "n_rows": len(df),
+    }
+
+
+def validate_frame(df, schema):
+    """Raise `SchemaError` unless `df` has exactly the schema's columns (in order) and dtypes."""
+    columns = [str(col) for col in df.columns]
+    if columns != schema["columns"]:
+        missing = [col for col in schema["columns"] if col not in columns]
+        extra = [col for col in columns if col not in schema["columns"]]
+        raise SchemaError(f"Columns differ from the schema (missing: {missing}, unexpected: {extra}).")
+    wrong = {col: str(df[col].dtype) for col in columns if str(df[col].dtype) != schema["dtypes"][col]}
+    if wrong:
+        expected = {col: schema["dtypes"][col] for col in wrong}
+        raise SchemaError(f"Dtypes differ from the schema: got {wrong}, expected {expected}.")
+    if "n_rows" in schema and len(df) != schema["n_rows"]:
+        raise SchemaError(f"Expected {schema['n_rows']} rows, found {len(df)}.")
+    return df
+
+
+def write_schema(path, df_or_schema, n_rows=None):
+    """Write the sidecar for `path`, from a frame or an existing schema dict (e.g. for chunked writers)."""
+    schema = df_or_schema if isinstance(df_or_schema, dict) else frame_schema(df_or_schema)
+    if n_rows is not None:
+        schema = {**schema, "n_rows": n_rows}
+    with open(schema_path(path), "w") as f:
+        json.dump(schema, f, indent=2)
+
+
+def read_schema(path):
+    """The recorded schema of `path`, or None if it has no sidecar."""
+    if not os.path.exists(schema_path(path)):
+        return None
+    with open(schema_path(path)) as f:
+        return json.load(f)
+
+
+def save_frame(df, path):
+    """Write `df` downcast to CSV plus its schema sidecar; returns the frame as written."""
+    df = downcast(df)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    df.to_csv(path, index=False)
+    write_schema(path, df)
+    return df
+
+
+def load_frame(path, validate=True):
+    """Read a CSV written by `save_frame` with its recorded dtypes (downcast if it has no sidecar)."""
+    schema = read_schema(path)
+    if schema is None:
+        return downcast(pd.read_csv(path))
+    df = pd.read_csv(path, dtype=schema["dtypes"], engine="c")
+    return validate_frame(df, schema) if validate else df
@@ -0,0 +1,233 @@
+"""
+score.py
+
+Headless batch scoring for large sensor files — no Streamlit, no browser.
+
+What it does:
+- Streams the input CSV or Parquet file in chunks of `SCORE_CHUNKSIZE` rows, reading only the
+  model's features plus `unit`/`cycle`. Chunks split units' histories, so rolling/EWMA model
+  features must already be in the file; otherwise the run stops up front and points to `--fleet`.
+- Converts each chunk straight to a validated float32 matrix with the model's precompiled
+  `FeatureLayout` (input_schema.py): missing columns, non-numeric or NaN/inf values and values far
+  outside the training range stop the run with an `InputError` naming the rows and features.
+  Parquet chunks stay Arrow record batches; only `unit`/`cycle` are converted for the output.
+- Predicts each chunk as one vectorized batch, spread over a process pool. Every worker loads the
+  model once (the flat `.npz` forest is memory-mapped, so workers share its pages) and runs
+  single-threaded, so OpenMP backends (HGB, LightGBM) do not start a thread per core in each worker.
+- Keeps a bounded number of chunks in flight and writes predictions in input order, next to
+  `unit`/`cycle`, as CSV or Parquet (chosen from the output file extension).
+- Each prediction comes with the per-tree interval (RUL_p10/RUL_p90) and the risk
+  P(RUL < RISK_THRESHOLD), from the same forest traversal as the point RUL (uncertainty.py).
+- With `--fleet`, keeps only the latest cycle of each unit while streaming (fleet.py) and writes a
+  table of units ranked by predicted RUL instead of one prediction per input row. If the model uses
+  rolling/EWMA features, the raw sensors are streamed into a `UnitStateStore` instead (unit_state.py),
+  which keeps just the history those features need per unit; each unit's cycles must then appear
+  in ascending order across the file (older cycles after newer ones are ignored).
+
+Parquet input/output needs pyarrow (`pip install pyarrow`).
+
+Usage:
+    python score.py INPUT OUTPUT [--model PATH] [--workers N] [--chunksize ROWS] [--fleet]
+"""
+
+import argparse
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+
+from config import SCORE_CHUNKSIZE
+from feature_engineering import base_sensors, parse_feature
+from fleet import fleet_snapshot, rank_fleet
+from model_store import default_model_path, get_model
+from uncertainty import predict_with_uncertainty, round_summary
+from unit_state import UnitStateStore
+
+ID_COLUMNS = ["unit", "cycle"]
+
+_worker_model_path = None
+
+
+def _is_parquet(path):
+    return path.endswith((".parquet", ".pq"))
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Parquet input/output requires `pip install pyarrow`.") from e
+    return pyarrow
+
+
+def _available_columns(path):
+    if _is_parquet(path):
+        return _require_pyarrow().parquet.ParquetFile(path).schema_arrow.names
+    return pd.read_csv(path, nrows=0).columns.tolist()
+
+
+def _input_columns(path, layout, names=None):
+    """`names` (default: the model features) plus whichever id columns the file has; `InputError` if any is missing."""
+    available = _available_columns(path)
+    names = list(layout.feature_names if names is None else names)
+    layout.require(available, names)
+    return [col for col in ID_COLUMNS if col in available] + names
+
+
+def iter_chunks(path, columns, chunksize=SCORE_CHUNKSIZE, arrow=False):
+    """Yield DataFrames (Parquet: Arrow record batches if `arrow`) of at most `chunksize` rows with only `columns`."""
+    if _is_parquet(path):
+        parquet_file = _require_pyarrow().parquet.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch if arrow else batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunksize)
+
+
+class _Writer:
+    """Append prediction frames to a CSV or Parquet file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet_writer = None
+        self.header = True
+
+    def write(self, df):
+        if _is_parquet(self.path):
+            pa = _require_pyarrow()
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self.parquet_writer is None:
+                self.parquet_writer = pa.parquet.ParquetWriter(self.path, table.schema)
+            self.parquet_writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode="w" if self.header else "a", header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+
+
+def _init_worker(model_path):
+    global _worker_model_path
+    _worker_model_path = model_path
+    get_model(model_path)
+
+
+def _init_pool_worker(model_path):
+    # One chunk per process: keep BLAS/OpenMP (HGB, LightGBM) single-threaded so workers don't oversubscribe cores
+    threadpool_limits(1)
+    _init_worker(model_path)
+
+
+def _predict_matrix(X):
+    return predict_with_uncertainty(get_model(_worker_model_path), X)
+
+
+def _to_output(chunk, predictions):
+    if isinstance(chunk, pd.DataFrame):
+        out = chunk[[col for col in ID_COLUMNS if col in chunk.columns]].reset_index(drop=True)
+    else:
+        out = pd.DataFrame({col: chunk.column(col).to_numpy() for col in ID_COLUMNS if col in chunk.schema.names})
+    return pd.concat([out, round_summary(predictions)], axis=1)
+
+
+def score_file(input_path, output_path, model_path=None, workers=None, chunksize=SCORE_CHUNKSIZE):
+    """Score `input_path` into `output_path`; returns the number of rows scored."""
+    model_path = model_path or default_model_path()
+    layout = get_model(model_path).layout
+    # Chunks split units' histories, so rolling/EWMA features must already be in the file (else use --fleet)
+    layout.require_row_scoring(_available_columns(input_path))
+    columns = _input_columns(input_path, layout)
+    workers = workers or os.cpu_count() or 1
+
+    writer = _Writer(output_path)
+    n_rows = 0
+    try:
+        if workers == 1:
+            _init_worker(model_path)
+            for chunk in iter_chunks(input_path, columns, chunksize, arrow=True):
+                writer.write(_to_output(chunk, _predict_matrix(layout.matrix(chunk, row_offset=n_rows))))
+                n_rows += len(chunk)
+            return n_rows
+
+        with ProcessPoolExecutor(workers, initializer=_init_pool_worker, initargs=(model_path,)) as pool:
+            pending = deque()
+            n_read = 0
+            for chunk in iter_chunks(input_path, columns, chunksize, arrow=True):
+                pending.append((chunk, pool.submit(_predict_matrix, layout.matrix(chunk, row_offset=n_read))))
+                n_read += len(chunk)
+                # Bound memory: at most two chunks per worker in flight
+                while len(pending) >= 2 * workers:
+                    done_chunk, future = pending.popleft()
+                    writer.write(_to_output(done_chunk, future.result()))
+                    n_rows += len(done_chunk)
+            while pending:
+                done_chunk, future = pending.popleft()
+                writer.write(_to_output(done_chunk, future.result()))
+                n_rows += len(done_chunk)
+    finally:
+        writer.close()
+    return n_rows
+
+
+def _engineered_snapshot(chunks, feature_names):
+    """(unit/cycle frame, feature matrix) of each unit's latest cycle, rolling/EWMA features from its history."""
+    store = UnitStateStore.for_features(feature_names)
+    for chunk in chunks:
+        store.ingest(chunk)
+    rows = np.arange(store.n_units)
+    snapshot = pd.DataFrame({"unit": store.units[rows], "cycle": store.last_cycle[rows]})
+    return snapshot, store.feature_matrix(rows, feature_names)
+
+
+def score_fleet_file(input_path, output_path, model_path=None, chunksize=SCORE_CHUNKSIZE):
+    """Score only the latest cycle per unit; returns the number of units scored."""
+    loaded = get_model(model_path or default_model_path())
+    engineered = any(parse_feature(name) for name in loaded.feature_names)
+    # Rolling/EWMA features are not in the file: read the raw sensors they are computed from
+    names = base_sensors(loaded.feature_names) if engineered else None
+    columns = _input_columns(input_path, loaded.layout, names)
+    if not all(col in columns for col in ID_COLUMNS):
+        raise KeyError(f"Fleet scoring needs {ID_COLUMNS} columns in the input.")
+
+    if engineered:
+        snapshot, X = _engineered_snapshot(iter_chunks(input_path, columns, chunksize), loaded.feature_names)
+        X = loaded.layout.check(X)
+    else:
+        snapshot = fleet_snapshot(iter_chunks(input_path, columns, chunksize))
+        X = loaded.layout.matrix(snapshot)
+    ranked = rank_fleet(snapshot, predict_with_uncertainty(loaded, X))
+    writer = _Writer(output_path)
+    try:
+        writer.write(ranked)
+    finally:
+        writer.close()
+    return len(ranked)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch-score a sensor CSV/Parquet file with the RUL model")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--model", default=None, help="model file (.npz, .joblib, .joblib.gz)")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=SCORE_CHUNKSIZE)
+    parser.add_argument("--fleet", action="store_true", help="score only the latest cycle of each unit, ranked")
+    args = parser.parse_args()
+
+    if args.fleet:
+        n_units = score_fleet_file(args.input, args.output, args.model, args.chunksize)
+        print(f"✅ Ranked {n_units:,} units by predicted RUL. Saved to: {args.output}")
+        return
+
+    n_rows = score_file(args.input, args.output, args.model, args.workers, args.chunksize)
+    print(f"✅ Scored {n_rows:,} rows. Predictions saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,41 +2,65 @@
 select_top_features.py
 
 Purpose:
-This script performs feature selection from the preprocessed training dataset 
+This script performs feature selection from the preprocessed training dataset
 by identifying the top N sensor features that have the strongest correlation with RUL.
 
 Workflow:
-- Loads preprocessed training data (with computed RUL) from preprocessing.py
-- Computes Pearson correlation of each sensor with RUL
-- Selects the top N features based on absolute correlation values
+- Loads the training data with computed RUL through preprocessing.load_datasets()
+- With ROLLING_FEATURES (config.py), adds per-unit rolling mean/std/slope and EWMA columns
+  (feature_engineering.py) so they compete with the raw sensors for selection
+- Computes Pearson correlation of each sensor with RUL (feature-vs-RUL only, see feature_selection.py)
+- Selects the top TOP_N_FEATURES (config.py) based on absolute correlation values
+- Persists the correlation statistics and ranking under outputs/ for incremental re-ranking
 - Creates a refined training dataset including only: unit, cycle, top N sensors, and RUL
 - Saves the new dataset for model training
 
 Output:
 - dataset/df_train_selected.csv — streamlined dataset for model training
+- outputs/correlation_stats.json, outputs/feature_ranking.json — reusable ranking artifacts
 """
 
+import os
 
+from config import ROLLING_FEATURES, TOP_N_FEATURES, TRAIN_SELECTED
+from feature_engineering import add_rolling_features
+from feature_selection import correlation_moments, rank_by_correlation
+from instrumentation import enable_jsonl, stage_timer
+from preprocessing import load_datasets
+from schema import save_frame
+from streaming import save_moments, save_ranking
 
-# to get model training data 
 
-from preprocessing import df_train  # Ensure df_train is available
-import pandas as pd
+def select_top_features(df_train, n=TOP_N_FEATURES):
+    """Return the top `n` feature names by absolute correlation with RUL."""
+    return rank_by_correlation(df_train).head(n).index.tolist()
 
-# Recalculate correlation with RUL
-correlations = df_train.drop(columns=['unit', 'cycle']).corr()
-rul_corr = correlations['RUL'].drop('RUL').sort_values(key=abs, ascending=False)
 
-# Select top N features (easier to modify later)
-N = 10  # Define the number of features to select
-top_features = rul_corr.head(N).index.tolist()
-print(f"🔹 Top {N} sensor features selected:", top_features)
+def build_selected_dataset(df_train, top_features):
+    """Keep only unit, cycle, the selected features, and RUL."""
+    features = ['unit', 'cycle'] + top_features
+    return df_train[features + ['RUL']]
 
-# Define the final dataset
-features = ['unit', 'cycle'] + top_features
-df_train_selected = df_train[features + ['RUL']]
 
-# Save the selected dataset
-save_path = "dataset/df_train_selected.csv"
-df_train_selected.to_csv(save_path, index=False)
-print(f"✅ Feature selection completed. Saved selected dataset to: {save_path}")
+def main():
+    enable_jsonl()
+    df_train, _, _ = load_datasets()
+    if ROLLING_FEATURES:
+        df_train = add_rolling_features(df_train)
+
+    # Rank all sensors once and persist the statistics so new batches can be merged later
+    moments = correlation_moments(df_train)
+    save_moments(moments)
+    top_features = save_ranking(moments.correlations(), TOP_N_FEATURES)
+    print(f"🔹 Top {TOP_N_FEATURES} sensor features selected:", top_features)
+
+    # Save the selected dataset
+    df_train_selected = build_selected_dataset(df_train, top_features)
+    os.makedirs(os.path.dirname(TRAIN_SELECTED), exist_ok=True)
+    with stage_timer("save_train_selected", rows=len(df_train_selected)):
+        save_frame(df_train_selected, TRAIN_SELECTED)
+    print(f"✅ Feature selection completed. Saved selected dataset to: {TRAIN_SELECTED}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""
+serve.py
+
+Standalone low-latency HTTP inference service for CMMS integration (plain asyncio, no web framework).
+
+Endpoints:
+- POST /predict   {"features": {"sensor_14": 47.5, ...}}            -> {"RUL": 112.4}
+                  {"rows": [{"sensor_14": 47.5, ...}, ...]}          -> {"RUL": [112.4, ...]}
+- GET  /metrics   request count, p50/p99 latency (ms), average model batch size
+- GET  /health    {"status": "ok"}
+
+Invalid rows (missing or non-numeric features, NaN/inf, values far outside the training range)
+are rejected with HTTP 400 and a structured body from input_schema.py:
+    {"error": "...", "errors": [{"code": "out_of_range", "row": 0, "feature": "sensor_14", "message": "..."}],
+     "total_errors": 1}
+Models with rolling/EWMA features (ROLLING_FEATURES) need each unit's history, which independent
+rows don't carry, so the service refuses them at startup (input_schema.FeatureLayout.require_row_scoring).
+A malformed Content-Length is a 400 and a body over SERVE_MAX_BODY_BYTES a 413; both close the connection
+without reading the body.
+
+How it stays fast:
+- The model is loaded once at startup (model_store.py; the flat `.npz` forest is memory-mapped).
+- Rows go straight from the parsed JSON into a float32 matrix in model order via the model's
+  precompiled `FeatureLayout` (input_schema.py), with no DataFrame per request.
+- Concurrent requests are coalesced by a `MicroBatcher`: rows arriving within `SERVE_MAX_WAIT_MS`
+  (or until `SERVE_MAX_BATCH` rows) are stacked into a single `model.predict` call, instead of
+  thousands of tiny per-row calls.
+
+`LocalClient` drives the service in-process without sockets, for local testing:
+
+    service = InferenceService()
+    client = LocalClient(service)
+    status, body = await client.post("/predict", {"features": {...}})
+
+Usage:
+    python serve.py [--host HOST] [--port PORT] [--model PATH]
+    python serve.py --selftest 1000     # fire 1000 concurrent single-row requests via LocalClient
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+from config import SERVE_HOST, SERVE_MAX_BATCH, SERVE_MAX_BODY_BYTES, SERVE_MAX_WAIT_MS, SERVE_PORT
+from input_schema import InputError
+from model_store import default_model_path, get_model
+
+
+class RequestError(Exception):
+    """Client error, reported as HTTP 400 with a JSON body."""
+
+
+class LatencyTracker:
+    """Rolling window of request latencies with percentile summaries."""
+
+    def __init__(self, window=10_000):
+        self.latencies_ms = deque(maxlen=window)
+        self.batch_sizes = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, seconds):
+        self.latencies_ms.append(seconds * 1000.0)
+        self.count += 1
+
+    def record_batch(self, size):
+        self.batch_sizes.append(size)
+
+    def summary(self):
+        if not self.latencies_ms:
+            return {"requests": self.count}
+        latencies = np.fromiter(self.latencies_ms, dtype=np.float64)
+        return {
+            "requests": self.count,
+            "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+            "model_calls": len(self.batch_sizes),
+            "avg_batch_rows": round(float(np.mean(self.batch_sizes)), 2) if self.batch_sizes else 0.0,
+        }
+
+
+class MicroBatcher:
+    """Coalesce concurrent `submit(rows)` calls into one `predict_fn` call per few milliseconds."""
+
+    def __init__(self, predict_fn, max_batch=SERVE_MAX_BATCH, max_wait_ms=SERVE_MAX_WAIT_MS, tracker=None):
+        self.predict_fn = predict_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.tracker = tracker
+        self.queue = None
+        self.worker = None
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self.worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+            self.worker = None
+
+    async def submit(self, rows):
+        """Predict a (k, n_features) float32 matrix; resolves once its batch has run."""
+        if self.worker is None:
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((rows, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self.queue.get()]
+            n_rows = len(items[0][0])
+            deadline = loop.time() + self.max_wait
+            while n_rows < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                items.append(item)
+                n_rows += len(item[0])
+
+            X = np.vstack([rows for rows, _ in items])
+            try:
+                # Off the event loop so new requests keep queueing while the model runs
+                predictions = await loop.run_in_executor(None, self.predict_fn, X)
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            if self.tracker is not None:
+                self.tracker.record_batch(len(X))
+
+            start = 0
+            for rows, future in items:
+                if not future.done():
+                    future.set_result(predictions[start:start + len(rows)])
+                start += len(rows)
+
+
+class InferenceService:
+    """Routes requests to the model through a `MicroBatcher`; transport-agnostic."""
+
+    def __init__(self, model_path=None, max_batch=SERVE_MAX_BATCH, max_wait_ms=SERVE_MAX_WAIT_MS):
+        self.loaded = get_model(model_path or default_model_path())
+        # Requests are independent rows without unit history: refuse history-based models at startup
+        self.loaded.layout.require_row_scoring()
+        self.tracker = LatencyTracker()
+        self.batcher = MicroBatcher(self._predict, max_batch, max_wait_ms, self.tracker)
+        # Pay one-off first-call costs (e.g. loading the compiled forest kernel) before the first request
+        self._predict(self.loaded.layout.matrix(self.loaded.layout.midpoints()))
+
+    def _predict(self, X):
+        return np.asarray(self.loaded.predict(X), dtype=np.float64)
+
+    def rows_to_matrix(self, rows):
+        """List of {feature: value} dicts -> validated (rows, features) float32 matrix in model order."""
+        return self.loaded.layout.matrix(rows)
+
+    async def predict(self, payload):
+        if not isinstance(payload, dict):
+            raise RequestError("Body must be a JSON object with 'features' or 'rows'.")
+        if "features" in payload:
+            if not isinstance(payload["features"], dict):
+                raise RequestError("'features' must be an object mapping feature names to values.")
+            predictions = await self.batcher.submit(self.rows_to_matrix([payload["features"]]))
+            return {"RUL": round(float(predictions[0]), 2)}
+        if "rows" in payload:
+            rows = payload["rows"]
+            if not isinstance(rows, list) or not rows:
+                raise RequestError("'rows' must be a non-empty list.")
+            predictions = await self.batcher.submit(self.rows_to_matrix(rows))
+            return {"RUL": np.round(predictions, 2).tolist()}
+        raise RequestError("Body must contain 'features' (one row) or 'rows' (a batch).")
+
+    async def handle(self, method, path, body=b""):
+        """Return (status, JSON-serialisable body) for one request."""
+        start = time.perf_counter()
+        try:
+            if method == "POST" and path == "/predict":
+                try:
+                    payload = json.loads(body or b"null")
+                except json.JSONDecodeError as e:
+                    raise RequestError(f"Invalid JSON: {e}")
+                result = await self.predict(payload)
+                self.tracker.record(time.perf_counter() - start)
+                return 200, result
+            if method == "GET" and path == "/metrics":
+                return 200, self.tracker.summary()
+            if method == "GET" and path == "/health":
+                return 200, {"status": "ok", "features": self.loaded.feature_names}
+            return 404, {"error": f"No route for {method} {path}"}
+        except RequestError as e:
+            return 400, {"error": str(e)}
+        except InputError as e:
+            return 400, e.to_dict()
+        except Exception as e:
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+
+
+class LocalClient:
+    """Stub client calling `InferenceService.handle` directly (no sockets)."""
+
+    def __init__(self, service):
+        self.service = service
+
+    async def post(self, path, payload):
+        return await self.service.handle("POST", path, json.dumps(payload).encode())
+
+    async def get(self, path):
+        return await self.service.handle("GET", path)
+
+
+# --- Minimal HTTP/1.1 transport ---
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def _content_length(headers, max_body=SERVE_MAX_BODY_BYTES):
+    """(body size, None) or (None, (status, error body)) for a bad or oversized Content-Length."""
+    try:
+        length = int(headers.get("content-length", 0) or 0)
+    except ValueError:
+        return None, (400, {"error": f"Invalid Content-Length: {headers['content-length']!r}"})
+    if length < 0:
+        return None, (400, {"error": f"Invalid Content-Length: {length}"})
+    if length > max_body:
+        return None, (413, {"error": f"Request body of {length} bytes exceeds the {max_body}-byte limit."})
+    return length, None
+
+
+async def _write_response(writer, status, result, keep_alive):
+    payload = json.dumps(result).encode()
+    writer.write(
+        f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + payload
+    )
+    await writer.drain()
+
+
+async def _handle_connection(service, reader, writer):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            try:
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+            except ValueError:
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length, rejected = _content_length(headers)
+            if rejected:
+                # The unread body would be parsed as the next request, so the connection ends here
+                await _write_response(writer, *rejected, keep_alive=False)
+                break
+            body = await reader.readexactly(length)
+
+            status, result = await service.handle(method.upper(), target.split("?", 1)[0], body)
+            keep_alive = headers.get("connection", "").lower() != "close"
+            await _write_response(writer, status, result, keep_alive)
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host=SERVE_HOST, port=SERVE_PORT, model_path=None):
+    service = InferenceService(model_path)
+    service.batcher.start()
+    server = await asyncio.start_server(lambda r, w: _handle_connection(service, r, w), host, port)
+    print(f"🚀 Serving {service.loaded.path} on http://{host}:{port} (POST /predict, GET /metrics)")
+    async with server:
+        await server.serve_forever()
+
+
+async def selftest(n_requests, model_path=None):
+    """Fire `n_requests` concurrent single-row requests through `LocalClient`; print metrics."""
+    service = InferenceService(model_path)
+    client = LocalClient(service)
+    rng = np.random.default_rng(0)
+    # Random rows within the accepted input ranges (unit interval for features without recorded ranges)
+    layout = service.loaded.layout
+    low = np.where(np.isfinite(layout.lower), layout.lower, -1.0)
+    high = np.where(np.isfinite(layout.upper), layout.upper, 1.0)
+    rows = [dict(zip(layout.feature_names, map(float, sample)))
+            for sample in rng.uniform(low, high, size=(n_requests, len(low)))]
+    responses = await asyncio.gather(*(client.post("/predict", {"features": row}) for row in rows))
+    await service.batcher.stop()
+    failures = [body for status, body in responses if status != 200]
+    if failures:
+        raise RuntimeError(f"{len(failures)} requests failed, e.g. {failures[0]}")
+    _, metrics = await client.get("/metrics")
+    print("✅ Self-test metrics:", metrics)
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RUL inference HTTP service with request micro-batching")
+    parser.add_argument("--host", default=SERVE_HOST)
+    parser.add_argument("--port", type=int, default=SERVE_PORT)
+    parser.add_argument("--model", default=None, help="model file (.npz, .joblib, .joblib.gz)")
+    parser.add_argument("--selftest", type=int, default=0, metavar="N",
+                        help="run N concurrent in-process requests and exit")
+    args = parser.parse_args()
+
+    try:
+        if args.selftest:
+            asyncio.run(selftest(args.selftest, args.model))
+        else:
+            asyncio.run(serve(args.host, args.port, args.model))
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}")
+
+
+if __name__ == "__main__":
+    main()
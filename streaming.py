@@ -0,0 +1,282 @@
+"""
+streaming.py
+
+Chunked, bounded-memory version of the preprocessing + correlation feature selection stages,
+for sensor histories that do not fit in RAM.
+
+What it does:
+- Reads a raw CMAPSS file in chunks of at most `STREAM_CHUNKSIZE` rows (C parser, typed columns).
+- Re-groups the chunks so every yielded frame holds only complete units: the trailing unit of a
+  chunk is carried over into the next one. Per-unit max cycle and RUL are therefore exact.
+- Accumulates feature-vs-RUL correlation statistics incrementally (Welford/Chan merge of means,
+  second moments and co-moments), so the top-N ranking matches `DataFrame.corr()` on the full data.
+- Writes df_train_with_rul.csv and df_train_selected.csv chunk by chunk.
+- Saves/loads those statistics (outputs/correlation_stats.json) and the resulting ranking
+  (outputs/feature_ranking.json); feature_selection.py builds on the same helpers.
+
+Assumes rows of the same unit are contiguous (true for CMAPSS exports); raises otherwise.
+
+Usage:
+    python streaming.py [--chunksize ROWS] [--top-n N]
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from compute_rul import compute_rul
+from config import (
+    CORRELATION_STATS_PATH,
+    FEATURE_RANKING_PATH,
+    RAW_TRAIN_PATH,
+    RUL_CAP,
+    STREAM_CHUNKSIZE,
+    TOP_N_FEATURES,
+    TRAIN_SELECTED,
+    TRAIN_WITH_RUL,
+)
+from data_loader import SENSOR_COLUMNS, parse_cmapss
+from schema import frame_schema, write_schema
+
+
+def iter_unit_chunks(path, chunksize=STREAM_CHUNKSIZE):
+    """Yield DataFrames of at most ~`chunksize` rows that only contain complete units."""
+    carry = None
+    seen_units = set()
+    for chunk in parse_cmapss(path, chunksize=chunksize):
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+
+        units = chunk["unit"].to_numpy()
+        last_unit = units[-1]
+        tail_start = len(units)
+        while tail_start > 0 and units[tail_start - 1] == last_unit:
+            tail_start -= 1
+
+        complete, carry = chunk.iloc[:tail_start], chunk.iloc[tail_start:]
+        if len(complete):
+            _check_contiguous(complete["unit"].to_numpy(), seen_units)
+            yield complete.reset_index(drop=True)
+
+    if carry is not None and len(carry):
+        _check_contiguous(carry["unit"].to_numpy(), seen_units)
+        yield carry.reset_index(drop=True)
+
+
+def _check_contiguous(units, seen_units):
+    starts = np.r_[True, units[1:] != units[:-1]]
+    block_units = units[starts]
+    if len(np.unique(block_units)) != len(block_units) or seen_units.intersection(block_units.tolist()):
+        raise ValueError("Streaming mode requires the rows of each unit to be contiguous in the file.")
+    seen_units.update(block_units.tolist())
+
+
+def iter_rul_chunks(path, chunksize=STREAM_CHUNKSIZE, cap=RUL_CAP):
+    """Yield complete-unit chunks with an RUL column."""
+    for chunk in iter_unit_chunks(path, chunksize):
+        yield compute_rul(chunk, cap=cap, inplace=True)
+
+
+_UPDATE_BLOCK_ROWS = 1 << 18
+
+
+class RunningMoments:
+    """
+    Mergeable first/second moments of several features and one target.
+
+    Keeps count, means, sums of squared deviations (M2) and feature-target co-moments,
+    updated batch by batch with the parallel Welford (Chan et al.) merge. Numerically stable
+    for long histories, unlike raw sums of squares.
+    """
+
+    def __init__(self, features):
+        self.features = list(features)
+        k = len(self.features)
+        self.n = 0
+        self.mean_x = np.zeros(k)
+        self.mean_y = 0.0
+        self.m2_x = np.zeros(k)
+        self.m2_y = 0.0
+        self.c_xy = np.zeros(k)
+
+    def update(self, X, y):
+        """Add a batch: `X` is (rows, features), `y` is (rows,)."""
+        if len(y) > _UPDATE_BLOCK_ROWS:
+            # Bounded float64 working copies for large float32 inputs
+            for start in range(0, len(y), _UPDATE_BLOCK_ROWS):
+                self.update(X[start:start + _UPDATE_BLOCK_ROWS], y[start:start + _UPDATE_BLOCK_ROWS])
+            return self
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        n_b = len(y)
+        if n_b == 0:
+            return self
+        mean_x = X.mean(axis=0)
+        mean_y = y.mean()
+        dx = X - mean_x
+        dy = y - mean_y
+        other = RunningMoments(self.features)
+        other.n = n_b
+        other.mean_x, other.mean_y = mean_x, mean_y
+        other.m2_x = np.einsum("ij,ij->j", dx, dx)
+        other.m2_y = float(dy @ dy)
+        other.c_xy = dy @ dx
+        return self.merge(other)
+
+    def merge(self, other):
+        """Fold another accumulator over the same features into this one."""
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            self.n = other.n
+            self.mean_x, self.mean_y = other.mean_x.copy(), other.mean_y
+            self.m2_x, self.m2_y, self.c_xy = other.m2_x.copy(), other.m2_y, other.c_xy.copy()
+            return self
+
+        n = self.n + other.n
+        delta_x = other.mean_x - self.mean_x
+        delta_y = other.mean_y - self.mean_y
+        weight = self.n * other.n / n
+
+        self.m2_x = self.m2_x + other.m2_x + delta_x ** 2 * weight
+        self.m2_y = self.m2_y + other.m2_y + delta_y ** 2 * weight
+        self.c_xy = self.c_xy + other.c_xy + delta_x * delta_y * weight
+        self.mean_x = self.mean_x + delta_x * other.n / n
+        self.mean_y = self.mean_y + delta_y * other.n / n
+        self.n = n
+        return self
+
+    def to_dict(self):
+        """JSON-serialisable snapshot of the sufficient statistics."""
+        return {
+            "features": self.features,
+            "n": self.n,
+            "mean_x": self.mean_x.tolist(),
+            "mean_y": self.mean_y,
+            "m2_x": self.m2_x.tolist(),
+            "m2_y": self.m2_y,
+            "c_xy": self.c_xy.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        moments = cls(state["features"])
+        moments.n = state["n"]
+        moments.mean_x = np.asarray(state["mean_x"], dtype=np.float64)
+        moments.mean_y = state["mean_y"]
+        moments.m2_x = np.asarray(state["m2_x"], dtype=np.float64)
+        moments.m2_y = state["m2_y"]
+        moments.c_xy = np.asarray(state["c_xy"], dtype=np.float64)
+        return moments
+
+    def correlations(self):
+        """Pearson correlation of each feature with the target (NaN for constant columns)."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = self.c_xy / np.sqrt(self.m2_x * self.m2_y)
+        corr[~np.isfinite(corr)] = np.nan
+        return pd.Series(corr, index=self.features)
+
+
+def stream_rul_moments(path, chunksize=STREAM_CHUNKSIZE, cap=RUL_CAP, features=SENSOR_COLUMNS,
+                       with_rul_path=None):
+    """
+    One pass over a raw file: return the feature-vs-RUL `RunningMoments`.
+
+    If `with_rul_path` is given, the chunks (with RUL) are also appended to that CSV.
+    """
+    moments = RunningMoments(features)
+    header = True
+    n_rows = 0
+    for chunk in iter_rul_chunks(path, chunksize, cap):
+        moments.update(chunk[features].to_numpy(), chunk["RUL"].to_numpy())
+        if with_rul_path is not None:
+            chunk.to_csv(with_rul_path, mode="w" if header else "a", header=header, index=False)
+            header = False
+            n_rows += len(chunk)
+    if with_rul_path is not None and not header:
+        write_schema(with_rul_path, frame_schema(chunk), n_rows)
+    return moments
+
+
+def stream_rul_correlations(path, chunksize=STREAM_CHUNKSIZE, cap=RUL_CAP, features=SENSOR_COLUMNS,
+                            with_rul_path=None):
+    """One pass over a raw file: return each feature's correlation with RUL."""
+    return stream_rul_moments(path, chunksize, cap, features, with_rul_path).correlations()
+
+
+def top_features_from_correlations(rul_corr, n):
+    """Rank by absolute correlation, like `corr['RUL'].sort_values(key=abs)`."""
+    return rul_corr.sort_values(key=abs, ascending=False).head(n).index.tolist()
+
+
+def save_moments(moments, path=CORRELATION_STATS_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(moments.to_dict(), f)
+
+
+def load_moments(path=CORRELATION_STATS_PATH):
+    with open(path) as f:
+        return RunningMoments.from_dict(json.load(f))
+
+
+def correlation_ranking(rul_corr, top_n=TOP_N_FEATURES):
+    """JSON-ready ranking: every feature's correlation with RUL plus the selected top-N names."""
+    rul_corr = rul_corr.sort_values(key=abs, ascending=False)
+    return {
+        "correlations": {name: (None if value != value else float(value)) for name, value in rul_corr.items()},
+        "top_features": top_features_from_correlations(rul_corr, top_n),
+    }
+
+
+def save_ranking(rul_corr, top_n=TOP_N_FEATURES, path=FEATURE_RANKING_PATH):
+    """Write the full correlation ranking and the selected top-N feature names."""
+    ranking = correlation_ranking(rul_corr, top_n)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(ranking, f, indent=2)
+    return ranking["top_features"]
+
+
+def load_ranking(path=FEATURE_RANKING_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_selected(path, top_features, out_path, chunksize=STREAM_CHUNKSIZE, cap=RUL_CAP):
+    """Second pass: write unit, cycle, selected sensors and RUL chunk by chunk."""
+    columns = ["unit", "cycle"] + top_features + ["RUL"]
+    header = True
+    n_rows = 0
+    for chunk in iter_rul_chunks(path, chunksize, cap):
+        chunk[columns].to_csv(out_path, mode="w" if header else "a", header=header, index=False)
+        header = False
+        n_rows += len(chunk)
+    if not header:
+        write_schema(out_path, frame_schema(chunk[columns]), n_rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming preprocessing + correlation feature selection")
+    parser.add_argument("--input", default=RAW_TRAIN_PATH)
+    parser.add_argument("--chunksize", type=int, default=STREAM_CHUNKSIZE)
+    parser.add_argument("--top-n", type=int, default=TOP_N_FEATURES)
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(TRAIN_WITH_RUL), exist_ok=True)
+    moments = stream_rul_moments(args.input, args.chunksize, with_rul_path=TRAIN_WITH_RUL)
+    print(f"✅ Streamed training set with RUL to: {TRAIN_WITH_RUL}")
+
+    save_moments(moments)
+    top_features = save_ranking(moments.correlations(), args.top_n)
+    print(f"🔹 Top {args.top_n} sensor features selected:", top_features)
+
+    write_selected(args.input, top_features, TRAIN_SELECTED, args.chunksize)
+    print(f"✅ Feature selection completed. Saved selected dataset to: {TRAIN_SELECTED}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,45 +2,104 @@
 test_preprocessing.py
 
 Purpose:
-Refines feature selection by training a Random Forest on the top 10 correlated features 
-(from df_train_selected.csv) and selecting the top 5 based on model-driven importance.
+Refines feature selection by ranking the top 10 correlated features (from df_train_selected.csv)
+with a small Random Forest and selecting the top 5 based on model-driven importance.
 
 Workflow:
 - Loads the dataset with top 10 features previously selected
-- Trains a Random Forest Regressor on these features
+- Draws a stratified sample of units (by lifetime, IMPORTANCE_SAMPLE_FRAC of them) so the
+  ranking forest sees every degradation profile without paying for the full fleet
+- Trains a small ranking forest (IMPORTANCE_RF_PARAMS: 20 trees on half-size bootstraps, all cores)
+  on these features. It exists only for its importances; the final model is trained separately.
 - Extracts the top 5 most important sensor features from the model
+- Saves the ranking as an artifact the final training stage reads its feature list from
 - Combines them with 'unit' and 'cycle' to form the final feature set
 - Saves a new dataset containing only the refined top 5 features
 
 Output:
 - dataset/df_test_selected.csv — final dataset for model training and prediction
+- outputs/importance_ranking.json — importances and the selected features
+- outputs/metrics.jsonl — stage timings (instrumentation.py)
 """
 
 
 import pandas as pd
 from sklearn.ensemble import RandomForestRegressor
 
-# Load your previously selected 10-feature training dataset
-df_train = pd.read_csv("dataset/df_train_selected.csv")
+from config import (
+    IMPORTANCE_RANKING_PATH,
+    IMPORTANCE_RF_PARAMS,
+    IMPORTANCE_SAMPLE_FRAC,
+    IMPORTANCE_TOP_K,
+    TEST_SELECTED,
+    TRAIN_SELECTED,
+)
+from feature_selection import save_importance_ranking
+from instrumentation import enable_jsonl, stage_timer, timed
+from schema import load_frame, save_frame
 
-# Separate features and target
 exclude_cols = ['unit', 'cycle', 'RUL']
-X = df_train.drop(columns=exclude_cols)
-y = df_train['RUL']
 
-# Train a Random Forest model
-model = RandomForestRegressor(n_estimators=100, random_state=42)
-model.fit(X, y)
 
-# Get feature importances
-importances = pd.Series(model.feature_importances_, index=X.columns)
-top_5 = importances.sort_values(ascending=False).head(5)
+def sample_units(df, frac, random_state=None, n_strata=5):
+    """Rows of a random `frac` of units, stratified by unit lifetime (max cycle)."""
+    if frac >= 1.0:
+        return df
+    life = df.groupby('unit')['cycle'].max()
+    strata = pd.qcut(life, min(n_strata, len(life)), labels=False, duplicates='drop')
+    units = life.groupby(strata).sample(frac=frac, random_state=random_state).index
+    return df[df['unit'].isin(units)]
 
-# Final selected features
-final_features = ['unit', 'cycle'] + top_5.index.tolist()
-print("🔥 Top 5 refined features based on model importance:", top_5.index.tolist())
 
-# Create new dataset
-df_train_refined = df_train[final_features + ['RUL']]
-df_train_refined.to_csv("dataset/df_test_selected.csv", index=False)
-print("✅ Refined df_train_selected.csv saved with top 5 model-informed features.")
+@timed("importance_forest")
+def rank_importance(df_train, sample_frac=IMPORTANCE_SAMPLE_FRAC, params=None):
+    """Feature importances from the small ranking forest, highest first."""
+    params = {**IMPORTANCE_RF_PARAMS, **(params or {})}
+    df_sample = sample_units(df_train, sample_frac, random_state=params.get('random_state'))
+
+    # Separate features and target
+    X = df_sample.drop(columns=exclude_cols)
+    y = df_sample['RUL']
+
+    # Train the ranking forest
+    model = RandomForestRegressor(**params)
+    model.fit(X, y)
+
+    # Get feature importances
+    importances = pd.Series(model.feature_importances_, index=X.columns)
+    return importances.sort_values(ascending=False)
+
+
+def refine_features(df_train, top_k=IMPORTANCE_TOP_K, sample_frac=IMPORTANCE_SAMPLE_FRAC, params=None):
+    """Return the `top_k` sensor names ranked by Random Forest importance."""
+    return rank_importance(df_train, sample_frac, params).head(top_k).index.tolist()
+
+
+def build_refined_dataset(df_train, top_features):
+    """Keep only unit, cycle, the refined sensors, and RUL."""
+    final_features = ['unit', 'cycle'] + top_features
+    return df_train[final_features + ['RUL']]
+
+
+def main():
+    enable_jsonl()
+
+    # Load your previously selected 10-feature training dataset
+    with stage_timer("read_train_selected") as record:
+        df_train = load_frame(TRAIN_SELECTED)
+        record["rows"] = len(df_train)
+
+    importances = rank_importance(df_train)
+    top_5 = save_importance_ranking(importances, IMPORTANCE_TOP_K)
+    print("🔥 Top 5 refined features based on model importance:", top_5)
+    print(f"💾 Importance ranking saved at: {IMPORTANCE_RANKING_PATH}")
+
+    # Create new dataset
+    df_train_refined = build_refined_dataset(df_train, top_5)
+    with stage_timer("save_test_selected", rows=len(df_train_refined)):
+        save_frame(df_train_refined, TEST_SELECTED)
+    print("✅ Refined df_train_selected.csv saved with top 5 model-informed features.")
+
+
+if __name__ == "__main__":
+    main()
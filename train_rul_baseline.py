@@ -2,66 +2,152 @@
 What This Script Actually Does:
 Trains a baseline Random Forest model for RUL prediction
 
-Handles dynamic feature overlap between train and test sets
+Trains on the features chosen by the importance stage (falls back to the train/test feature overlap)
 
 Aligns test data with PM_truth.txt using last cycle per engine
 
 Predicts RUL and evaluates using RMSE metric
 
+`--backend NAME` trains another model_backends.py backend instead (default: MODEL_BACKEND in config.py)
+
+`--add-trees N` loads the saved forest and grows N more trees instead of retraining it
+
 This is a first-pass benchmark model — useful for sanity check, speed, and feature sensitivity analysis.
 
 """
 
+import argparse
 import joblib
 import os
-import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error
 import numpy as np
 
-# Load processed training and testing data
-df_train = pd.read_csv("dataset/df_train_selected.csv")
-df_test = pd.read_csv("dataset/df_test_selected.csv")
+from config import (
+    FEATURE_RANGES_PATH,
+    IMPORTANCE_RANKING_PATH,
+    MODEL_BACKEND,
+    MODEL_NPZ_PATH,
+    MODEL_OUTPUT_PATH,
+    RAW_TEST_PATH,
+    TEST_SELECTED,
+    TRAIN_SELECTED,
+    TRUTH_PATH,
+)
+from data_loader import load_cmapss, load_truth
+from feature_engineering import ensure_features
+from feature_selection import load_selected_features
+from flat_forest import export_forest, remove_export
+from fleet import last_cycle_per_unit
+from input_schema import feature_ranges, save_feature_ranges
+from instrumentation import enable_jsonl, stage_timer, timed
+from model_backends import MODEL_BACKENDS, make_model
+from model_store import save_model_metrics
+from schema import load_frame
 
-# Define feature columns (dynamically)
 exclude_cols = ['unit', 'cycle', 'RUL']
-feature_cols = [col for col in df_train.columns if col not in exclude_cols]
 
-# Handle feature mismatch between train and test
-feature_cols = [col for col in feature_cols if col in df_test.columns]
 
-# Prepare training data
-X_train = df_train[feature_cols]
-y_train = df_train['RUL']
+def get_feature_cols(df_train, df_test):
+    """Feature columns of the training set that are also present in the test set."""
+    # Define feature columns (dynamically)
+    feature_cols = [col for col in df_train.columns if col not in exclude_cols]
+
+    # Handle feature mismatch between train and test
+    return [col for col in feature_cols if col in df_test.columns]
+
+
+@timed("train_model")
+def train_model(df_train, feature_cols, params=None, backend=MODEL_BACKEND):
+    """Fit the `backend` model (Random Forest by default) on `feature_cols`."""
+    X_train = df_train[feature_cols]
+    y_train = df_train['RUL']
+
+    model = make_model(backend, params)
+    model.fit(X_train, y_train)
+    return model
+
+
+def add_trees(model, df_new, n_trees):
+    """
+    Warm-start an already fitted forest: keep its trees and fit `n_trees` more on `df_new`.
+
+    The new trees only see `df_new`, so this is the cheap way to fold in newly arrived data.
+    """
+    if not hasattr(model, 'n_estimators'):
+        raise TypeError(f"{type(model).__name__} does not support adding trees.")
+    X_new = df_new[list(model.feature_names_in_)]
+    model.set_params(warm_start=True, n_estimators=model.n_estimators + n_trees)
+    model.fit(X_new, df_new['RUL'])
+    return model
+
+
+@timed("evaluate_holdout")
+def evaluate_holdout(model, df_test, df_truth, feature_cols):
+    """RMSE on the final cycle of each test engine, aligned with the truth RUL values."""
+    # Rolling/EWMA features need each engine's full history, so add them before taking the final cycle
+    df_test = ensure_features(df_test, feature_cols)
+
+    # Prepare test data (only final cycle of each engine, ordered by unit like PM_truth.txt)
+    df_last_cycle = last_cycle_per_unit(df_test)
+
+    X_test = df_last_cycle[feature_cols]
+    y_test = df_truth["RUL"].to_numpy()
+
+    y_pred = model.predict(X_test)
+    return np.sqrt(mean_squared_error(y_test, y_pred))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the baseline RUL Random Forest")
+    parser.add_argument("--add-trees", type=int, default=0,
+                        help="warm-start the saved model with this many extra trees instead of retraining")
+    parser.add_argument("--backend", default=MODEL_BACKEND, choices=sorted(MODEL_BACKENDS))
+    args = parser.parse_args()
+    enable_jsonl()
 
-# Prepare test data (only final cycle of each engine)
-df_last_cycle = df_test.groupby("unit").agg({"cycle": "max"}).reset_index()
-df_last_cycle = df_test.merge(df_last_cycle, on=["unit", "cycle"], how="inner")
+    # Load processed training data and the raw held-out test engines
+    with stage_timer("read_train_selected") as record:
+        df_train = load_frame(TRAIN_SELECTED)
+        record["rows"] = len(df_train)
+    df_test = load_cmapss(RAW_TEST_PATH)
 
-# Load true RUL values
-rul_truth = pd.read_csv("dataset/PM_truth.txt", header=None)
-rul_truth.columns = ["RUL"]
-df_last_cycle["RUL_true"] = rul_truth["RUL"]
+    # Load true RUL values
+    df_truth = load_truth(TRUTH_PATH)
 
-X_test = df_last_cycle[feature_cols]
-y_test = df_last_cycle["RUL_true"]
+    if os.path.exists(IMPORTANCE_RANKING_PATH):
+        feature_cols = load_selected_features(IMPORTANCE_RANKING_PATH)
+    else:
+        feature_cols = get_feature_cols(df_train, load_frame(TEST_SELECTED))
 
-# Train model
-model = RandomForestRegressor(n_estimators=100, random_state=42)
-model.fit(X_train, y_train)
+    if args.add_trees:
+        model = add_trees(joblib.load(MODEL_OUTPUT_PATH), df_train, args.add_trees)
+        print(f"🌲 Added {args.add_trees} trees (total: {model.n_estimators})")
+    else:
+        model = train_model(df_train, feature_cols, backend=args.backend)
 
-# Predict
-y_pred = model.predict(X_test)
+    rmse = evaluate_holdout(model, df_test, df_truth, feature_cols)
+    print("✅ RMSE:", rmse)
 
-# Evaluate
-rmse = np.sqrt(mean_squared_error(y_test, y_pred))
-print("✅ RMSE:", rmse)
+    # Ensure output folder exists
+    os.makedirs(os.path.dirname(MODEL_OUTPUT_PATH), exist_ok=True)
 
+    # Save trained model
+    with stage_timer("save_model"):
+        joblib.dump(model, MODEL_OUTPUT_PATH)
+    print(f"💾 Model saved at: {MODEL_OUTPUT_PATH}")
+    save_model_metrics({"backend": args.backend, "holdout_rmse": float(rmse)})
 
+    save_feature_ranges(feature_ranges(df_train, list(model.feature_names_in_)))
+    print(f"💾 Feature ranges saved at: {FEATURE_RANGES_PATH}")
+
+    # Flat, mmap-able copy for fast serving cold starts (forests only)
+    if hasattr(model, 'estimators_'):
+        with stage_timer("export_forest"):
+            export_forest(model, MODEL_NPZ_PATH)
+        print(f"💾 Flat forest exported at: {MODEL_NPZ_PATH}")
+    elif remove_export(MODEL_NPZ_PATH):
+        print(f"🗑️ Removed stale flat forest {MODEL_NPZ_PATH} (the {args.backend} model is not a forest)")
 
-# Ensure output folder exists
-os.makedirs("outputs", exist_ok=True)
 
-# Save trained model
-joblib.dump(model, "outputs/rf_rul_model.joblib")
-print("💾 Model saved at: outputs/rf_rul_model.joblib")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+uncertainty.py
+
+RUL intervals and failure risk from the spread of the forest's per-tree predictions.
+
+What it does:
+- `predict_with_uncertainty(model, X)` runs one traversal that keeps every tree's prediction,
+  (rows, trees), and derives everything from that matrix: the mean (the usual point RUL), the
+  PREDICTION_QUANTILES (an interval, 10%-90% by default), and the share of trees predicting
+  RUL below RISK_THRESHOLD, reported as P(RUL < threshold). There is no second model call and no
+  separate quantile model.
+- Works with the flat forest (FlatForest.tree_predictions, same kernels as `predict`) and with a
+  joblib RandomForestRegressor (one `predict` per tree). Models without trees to disagree
+  (gradient boosting backends) get the point RUL and NaN interval/risk columns.
+- Rows are processed in blocks of UNCERTAINTY_BLOCK_ROWS, so the (rows, trees) matrix stays small.
+
+The spread measures how much the trees disagree, not a calibrated predictive distribution.
+`python uncertainty.py` checks it on the PM_truth.txt holdout: interval coverage, mean width,
+and the Brier score of the risk estimate.
+
+Usage:
+    summary = predict_with_uncertainty(loaded, X)   # DataFrame: RUL_pred, RUL_p10, RUL_p90, P_RUL_lt_30
+    python uncertainty.py [--model PATH]
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from config import PREDICTION_QUANTILES, RAW_TEST_PATH, RISK_THRESHOLD, TRUTH_PATH
+from data_loader import load_cmapss, load_truth
+from feature_engineering import ensure_features
+from flat_forest import FlatForest
+from model_store import default_model_path, get_model
+
+UNCERTAINTY_BLOCK_ROWS = 8192
+
+
+def quantile_column(q):
+    return f"RUL_p{round(q * 100):g}"
+
+
+def risk_column(threshold):
+    return f"P_RUL_lt_{threshold:g}"
+
+
+def tree_predictions(model, X):
+    """(rows, trees) per-tree predictions of a forest, or None for models without trees."""
+    if isinstance(model, FlatForest):
+        return model.tree_predictions(X)
+    if hasattr(model, "estimators_") and hasattr(model, "bootstrap"):
+        X = np.asarray(X, dtype=np.float32)
+        return np.stack([tree.predict(X) for tree in model.estimators_], axis=1)
+    return None
+
+
+def summarize_trees(per_tree, quantiles=PREDICTION_QUANTILES, threshold=RISK_THRESHOLD):
+    """Point RUL, quantiles and P(RUL < threshold) per row of a (rows, trees) prediction matrix."""
+    summary = {"RUL_pred": per_tree.mean(axis=1)}
+    for q, values in zip(quantiles, np.quantile(per_tree, quantiles, axis=1)):
+        summary[quantile_column(q)] = values
+    summary[risk_column(threshold)] = (per_tree < threshold).mean(axis=1)
+    return summary
+
+
+def predict_with_uncertainty(model, X, quantiles=PREDICTION_QUANTILES, threshold=RISK_THRESHOLD):
+    """
+    DataFrame with RUL_pred, one column per quantile and P(RUL < threshold), one row per row of `X`.
+
+    `model` is a `model_store.LoadedModel` or a fitted model; `X` a matrix in the model's feature order.
+    """
+    model = getattr(model, "model", model)
+    columns = ["RUL_pred"] + [quantile_column(q) for q in quantiles] + [risk_column(threshold)]
+    blocks = []
+    for start in range(0, len(X), UNCERTAINTY_BLOCK_ROWS):
+        block = X[start:start + UNCERTAINTY_BLOCK_ROWS]
+        per_tree = tree_predictions(model, block)
+        if per_tree is None:
+            summary = dict.fromkeys(columns, np.full(len(block), np.nan))
+            summary["RUL_pred"] = model.predict(block)
+        else:
+            summary = summarize_trees(per_tree, quantiles, threshold)
+        blocks.append(pd.DataFrame(summary, columns=columns))
+    if not blocks:
+        return pd.DataFrame(columns=columns, dtype=np.float64)
+    return pd.concat(blocks, ignore_index=True)
+
+
+def round_summary(summary):
+    """RUL columns to 2 decimals, probabilities to 3 (the precision the outputs report)."""
+    risk = [col for col in summary.columns if col.startswith("P_")]
+    return summary.round({col: 3 if col in risk else 2 for col in summary.columns})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check per-tree RUL intervals and risk on the PM_truth.txt holdout")
+    parser.add_argument("--model", default=None, help="model file (.npz, .joblib, .joblib.gz)")
+    args = parser.parse_args()
+
+    from fleet import last_cycle_per_unit  # fleet.py scores with this module, so import it only here
+
+    loaded = get_model(args.model or default_model_path())
+    df_test = last_cycle_per_unit(ensure_features(load_cmapss(RAW_TEST_PATH), loaded.feature_names))
+    y = load_truth(TRUTH_PATH)["RUL"].to_numpy()
+    summary = predict_with_uncertainty(loaded, loaded.layout.matrix(df_test))
+
+    low, high = (summary[quantile_column(q)].to_numpy() for q in (PREDICTION_QUANTILES[0], PREDICTION_QUANTILES[-1]))
+    risk = summary[risk_column(RISK_THRESHOLD)].to_numpy()
+    rmse = np.sqrt(np.mean((summary["RUL_pred"].to_numpy() - y) ** 2))
+    print(f"✅ Holdout ({len(y)} engines): RMSE {rmse:.2f}")
+    print(f"   [{quantile_column(PREDICTION_QUANTILES[0])}, {quantile_column(PREDICTION_QUANTILES[-1])}] "
+          f"covers {np.mean((y >= low) & (y <= high)):.0%} of true RULs "
+          f"(nominal {PREDICTION_QUANTILES[-1] - PREDICTION_QUANTILES[0]:.0%}), mean width {np.mean(high - low):.1f} cycles")
+    print(f"   {risk_column(RISK_THRESHOLD)}: Brier score {np.mean((risk - (y < RISK_THRESHOLD)) ** 2):.3f} "
+          f"({int(np.sum(y < RISK_THRESHOLD))} engines truly below {RISK_THRESHOLD})")
+
+
+if __name__ == "__main__":
+    main()